@@ -0,0 +1,115 @@
+import threading
+import weakref
+from typing import Callable
+
+
+class AtomicReference[T]:
+    """
+    frozen なモデルへの参照を compare-and-swap で差し替えるコンテナ
+
+    新しい値の計算 (enhance / damage など) はロックの外で行い、ロックは
+    参照の比較と差し替えの瞬間だけ保持する。値が不変なので読み取りはロック不要。
+    """
+
+    def __init__(self, value: T):
+        self._value = value
+        self._lock = threading.Lock()
+        self.retries = 0
+
+    def get(self) -> T:
+        return self._value
+
+    def set(self, value: T) -> None:
+        with self._lock:
+            self._value = value
+
+    def compare_and_set(self, expected: T, new: T) -> bool:
+        """現在の値が expected (同一オブジェクト) のときだけ new に差し替える"""
+        with self._lock:
+            if self._value is not expected:
+                return False
+            self._value = new
+            return True
+
+    def update(self, func: Callable[[T], T]) -> T:
+        """func(現在の値) で更新する。他スレッドに先を越されたら再計算してリトライする"""
+        while True:
+            current = self._value
+            new = func(current)
+            with self._lock:
+                if self._value is current:
+                    self._value = new
+                    return new
+                # retries もロック内で数える (free-threaded ビルドでも取りこぼさない)
+                self.retries += 1
+
+
+class ShardedCounter:
+    """
+    スレッドごとのセルに加算し、読み取り時に合算するカウンタ
+
+    加算は自スレッドのセルだけを書き換えるのでロック不要。
+    ロックはセルの登録 (スレッドごとに 1 回)・読み取りと reset のときだけ使う。
+    終了したスレッドのセルは _base に畳み込んで捨てるので、スレッドの入れ替わりが多くても増え続けない。
+    """
+
+    def __init__(self, value: int = 0):
+        self._base = value
+        self._cells: list[list[int]] = []
+        self._retired: list[list[int]] = []  # 終了したスレッドのセル (次にロックを取ったときに畳み込む)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _cell(self) -> list[int]:
+        cell = getattr(self._local, "cell", None)
+        if cell is None:
+            cell = [0]
+            # スレッドが終わると thread-local ごと token が消えるので、そのときにセルを回収する
+            token = _ThreadToken()
+            weakref.finalize(token, _retire_cell, weakref.ref(self), cell)
+            self._local.cell = cell
+            self._local.token = token
+            with self._lock:
+                self._fold_retired()
+                self._cells.append(cell)
+        return cell
+
+    def _retire(self, cell: list[int]) -> None:
+        # GC から呼ばれるので、ロックを持ったスレッド上で走っても詰まらないようロックは取らない
+        self._retired.append(cell)
+
+    def _fold_retired(self) -> None:
+        # self._lock を保持した状態で呼ぶこと
+        while self._retired:
+            cell = self._retired.pop()
+            self._base += cell[0]
+            self._cells.remove(cell)
+
+    def add(self, x: int) -> None:
+        self._cell()[0] += x
+
+    @property
+    def value(self) -> int:
+        # _base とセル一覧は同じロック区間で読む (回収と重なってセルを二重に数えないように)
+        with self._lock:
+            self._fold_retired()
+            return self._base + sum(cell[0] for cell in self._cells)
+
+    def reset(self, value: int = 0) -> None:
+        """値を value に戻す (実行中の add と同時に呼ぶと、その分は反映されないことがある)"""
+        with self._lock:
+            self._fold_retired()
+            self._base = value - sum(cell[0] for cell in self._cells)
+
+
+class _ThreadToken:
+    """スレッドの終了を検知するためだけの thread-local オブジェクト"""
+
+    __slots__ = ("__weakref__",)
+
+
+def _retire_cell(counter_ref: "weakref.ref[ShardedCounter]", cell: list[int]) -> None:
+    # カウンタ本体が先に破棄されていれば何もしない
+    counter = counter_ref()
+    if counter is not None:
+        counter._retire(cell)
@@ -0,0 +1,104 @@
+"""
+共有状態更新のスレッド数スケーリングベンチマーク
+
+- lock:    1 つの threading.Lock の中で enhance して差し替える (従来の book345ng)
+- cas:     AtomicReference.update (enhance はロックの外, 差し替えだけ CAS)
+- counter: ロック付き int カウンタ
+- sharded: ShardedCounter (スレッドごとに加算, 読み取り時に合算)
+
+free-threaded (no-GIL) ビルドで実行すると差が出る:
+  uv run --python 3.13t bench_atomic_state.py
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+from atomic_state import AtomicReference, ShardedCounter
+from book345ng import AttackPower, weapon
+
+
+def _run_threads(n_threads: int, target) -> float:
+    threads = [threading.Thread(target=target) for _ in range(n_threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start
+
+
+def bench_lock(n_threads: int, ops: int) -> float:
+    state = {"weapon": weapon(attackPower=AttackPower(value=0))}
+    lock = threading.Lock()
+    increment = AttackPower(value=1)
+
+    def work():
+        for _ in range(ops):
+            with lock:
+                state["weapon"] = state["weapon"].enhance(increment)
+
+    elapsed = _run_threads(n_threads, work)
+    assert state["weapon"].attackPower.value == n_threads * ops
+    return elapsed
+
+
+def bench_cas(n_threads: int, ops: int) -> float:
+    ref = AtomicReference(weapon(attackPower=AttackPower(value=0)))
+    increment = AttackPower(value=1)
+
+    def work():
+        for _ in range(ops):
+            ref.update(lambda w: w.enhance(increment))
+
+    elapsed = _run_threads(n_threads, work)
+    assert ref.get().attackPower.value == n_threads * ops
+    return elapsed
+
+
+def bench_counter(n_threads: int, ops: int) -> float:
+    state = {"value": 0}
+    lock = threading.Lock()
+
+    def work():
+        for _ in range(ops):
+            with lock:
+                state["value"] += 1
+
+    elapsed = _run_threads(n_threads, work)
+    assert state["value"] == n_threads * ops
+    return elapsed
+
+
+def bench_sharded(n_threads: int, ops: int) -> float:
+    counter = ShardedCounter()
+
+    def work():
+        for _ in range(ops):
+            counter.add(1)
+
+    elapsed = _run_threads(n_threads, work)
+    assert counter.value == n_threads * ops
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="共有状態更新ベンチマーク")
+    parser.add_argument('-n', '--ops', type=int, default=50_000, help='スレッドあたりの操作回数（デフォルト: 50000）')
+    parser.add_argument('-t', '--threads', type=int, nargs='+', default=[1, 2, 4, 8], help='スレッド数（デフォルト: 1 2 4 8）')
+    args = parser.parse_args()
+
+    gil = sys._is_gil_enabled() if hasattr(sys, "_is_gil_enabled") else True
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}")
+    print(f"{'threads':>7} " + " ".join(f"{name:>12}" for name in ("lock", "cas", "counter", "sharded")) + "   (Mops/s)")
+    for n_threads in args.threads:
+        row = []
+        for bench in (bench_lock, bench_cas, bench_counter, bench_sharded):
+            elapsed = bench(n_threads, args.ops)
+            row.append(n_threads * args.ops / elapsed / 1e6)
+        print(f"{n_threads:>7} " + " ".join(f"{v:>12.3f}" for v in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+値オブジェクトの生成コスト比較ベンチマーク
+
+enhance / reset / damage と同じ処理を、インスタンスの生成方法だけ変えて比較する。
+
+- validated:       通常のコンストラクタ (pydantic-core による検証あり, 公開コンストラクタ)
+- model_construct: pydantic の検証省略 API (既定値の補完などを汎用に行うので遅い)
+- trusted:         各モデルの _trusted (フィールドを固定した __dict__ を直接設定, メソッド内部の実装)
+
+methods は実際のモデルのメソッド (enhance / reset / damage) をそのまま呼んだ場合
+(内部で _trusted を使う。trusted の行は make 経由のキーワード引数のぶん遅く出る)。
+
+使い方: uv run bench_value_objects.py [-n 回数]
+"""
+
+import argparse
+import time
+
+from pydantic import BaseModel
+
+from book345ng import AttackPower, weapon
+from book433ok import HitPoint, Member, StateType, States
+
+
+def validated(cls, **values):
+    return cls(**values)
+
+
+def model_construct(cls, **values):
+    return cls.model_construct(**values)
+
+
+def trusted(cls, **values):
+    return cls._trusted(**values)
+
+
+def enhance(make, w: weapon, increment: AttackPower) -> weapon:
+    return make(weapon, attackPower=make(AttackPower, value=w.attackPower.value + increment.value))
+
+
+def reset(make, w: weapon) -> weapon:
+    return make(weapon, attackPower=make(AttackPower, value=0))
+
+
+def damage(make, m: Member, damage_amount: int) -> Member:
+    hitpoint = make(HitPoint, amount=max(m.hitpoint.amount - damage_amount, m.hitpoint.MIN))
+    states = m.states
+    if hitpoint.is_zero():
+        states = make(States, state=m.states.state + StateType.dead.value)
+    return make(Member, hitpoint=hitpoint, states=states)
+
+
+def bench_weapon(make, n: int) -> BaseModel:
+    increment = AttackPower(value=1)
+    w = weapon(attackPower=AttackPower(value=0))
+    if make is None:
+        for i in range(n):
+            w = w.reset() if i % 100 == 99 else w.enhance(increment)
+        return w
+    for i in range(n):
+        w = reset(make, w) if i % 100 == 99 else enhance(make, w, increment)
+    return w
+
+
+def bench_member(make, n: int) -> BaseModel:
+    m = Member(hitpoint=HitPoint(amount=n), states=States())
+    if make is None:
+        for _ in range(n):
+            m = m.damage(1)
+        return m
+    for _ in range(n):
+        m = damage(make, m, 1)
+    return m
+
+
+def main():
+    parser = argparse.ArgumentParser(description="値オブジェクト生成ベンチマーク")
+    parser.add_argument('-n', '--number', type=int, default=200_000, help='繰り返し回数（デフォルト: 200000）')
+    args = parser.parse_args()
+
+    n = args.number
+    for title, bench in (("weapon.enhance / reset", bench_weapon), ("Member.damage", bench_member)):
+        print(f"{title} x {n}")
+        results = {}
+        baseline = None
+        for name, make in (("validated", validated), ("model_construct", model_construct),
+                           ("trusted", trusted), ("methods", None)):
+            # 環境のゆらぎを減らすため、3 回のうち最速の値を使う
+            elapsed = float("inf")
+            for _ in range(3):
+                start = time.perf_counter()
+                results[name] = bench(make, n)
+                elapsed = min(elapsed, time.perf_counter() - start)
+            baseline = baseline or elapsed
+            print(f"  {name:<16} {elapsed:8.3f}s  ({elapsed / n * 1e6:6.2f} us/op, {baseline / elapsed:5.2f}x)")
+        # どの経路でも同じ結果になることを確認
+        assert len({r.model_dump_json() for r in results.values()}) == 1
+
+
+if __name__ == "__main__":
+    main()
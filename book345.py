@@ -25,14 +25,17 @@ def thread_func_add():
     for _ in range(2):
         with lock:
             model.add_inplace(1)
-            print(f"[Add] value = {model.value}")
+            value = model.value
+        # print はロックの外で行う
+        print(f"[Add] value = {value}")
         time.sleep(0.1)
 
 
 def thread_func_reset():
     with lock:
         model.reset_inplace()
-        print(f"[Reset] value = {model.value}")
+        value = model.value
+    print(f"[Reset] value = {value}")
 
 
 # スレッド起動
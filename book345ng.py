@@ -3,6 +3,10 @@ import threading
 import time
 from typing import Final
 
+from atomic_state import AtomicReference
+from intern_cache import intern
+from trusted_model import new, set_dict, set_extra, set_fields_set, set_private
+
 
 class AttackPower(BaseModel):
     # PydanticDeprecatedSince211: Annotation 'value' is marked as final and has a default value. Pydantic treats 'value' as a class variable, but it will be considered as a normal field in V3 to be aligned with dataclasses. If you still want 'value' to be considered as a class variable, annotate it as: `ClassVar[<type>] = <default>.`. Deprecated in Pydantic V2.11 to be removed in V3.0.
@@ -10,23 +14,43 @@ class AttackPower(BaseModel):
     model_config = ConfigDict(frozen=True)
     value: int = 0
 
+    @classmethod
+    def _trusted(cls, value: int) -> "AttackPower":
+        # int 同士の和など、検証済みの値から導出した場合だけ使う
+        obj = new(cls)
+        set_dict(obj, {'value': value})
+        set_fields_set(obj, {'value'})
+        set_extra(obj, None)
+        set_private(obj, None)
+        return obj
+
     def add(self, x: "AttackPower") -> "AttackPower":
-        return AttackPower(value=self.value + x.value)
+        return AttackPower._trusted(self.value + x.value)
 
     def reset(self) -> "AttackPower":
-        return AttackPower(value=0)
+        # 0 は頻出なので共有インスタンスを返す
+        return intern(AttackPower, value=0)
 
 
 class weapon(BaseModel):
     attackPower: AttackPower
 
+    @classmethod
+    def _trusted(cls, attackPower: AttackPower) -> "weapon":
+        obj = new(cls)
+        set_dict(obj, {'attackPower': attackPower})
+        set_fields_set(obj, {'attackPower'})
+        set_extra(obj, None)
+        set_private(obj, None)
+        return obj
+
     def enhance(self, increment: AttackPower) -> "weapon":
         new_power = self.attackPower.add(increment)
-        return weapon(attackPower=new_power)
+        return weapon._trusted(new_power)
 
     def reset(self) -> "weapon":
         new_power = self.attackPower.reset()
-        return weapon(attackPower=new_power)
+        return weapon._trusted(new_power)
 
 
 # これはエラーになる
@@ -37,36 +61,33 @@ AttackPowerA = AttackPower(value=10)
 AttackPowerB = AttackPower(value=10)
 
 
-weaponA = weapon(attackPower=AttackPowerA)
-weaponB = weapon(attackPower=AttackPowerB)
-
-lock = threading.Lock()
+# 参照の差し替えだけを CAS で行う (計算と print はロックの外)
+weaponA = AtomicReference(weapon(attackPower=AttackPowerA))
+weaponB = AtomicReference(weapon(attackPower=AttackPowerB))
 
 
 def thread_func_add():
-    global weaponA
+    # ループ中は同じ値なので、インターンはループの外で 1 回だけ行う
+    AttackPower1 = intern(AttackPower, value=1)
     for _ in range(5):
-        with lock:
-            AttackPower1 = AttackPower(value=1)
-            weaponA = weaponA.enhance(AttackPower1)
-            print(f"[weaponA] value = {weaponA.attackPower.value}")
+        new_weapon = weaponA.update(lambda w: w.enhance(AttackPower1))
+        print(f"[weaponA] value = {new_weapon.attackPower.value}")
         time.sleep(0.1)
 
 
 def thread_func_reset():
-    global weaponB
     for _ in range(3):
-        with lock:
-            weaponB = weaponB.reset()
-            print(f"[weaponB] value = {weaponB.attackPower.value}")
+        new_weapon = weaponB.update(lambda w: w.reset())
+        print(f"[weaponB] value = {new_weapon.attackPower.value}")
         time.sleep(0.3)
 
 
-# スレッド起動
-thread_add = threading.Thread(target=thread_func_add)
-thread_reset = threading.Thread(target=thread_func_reset)
+if __name__ == "__main__":
+    # スレッド起動
+    thread_add = threading.Thread(target=thread_func_add)
+    thread_reset = threading.Thread(target=thread_func_reset)
 
-thread_add.start()
-thread_reset.start()
-thread_add.join()
-thread_reset.join()
+    thread_add.start()
+    thread_reset.start()
+    thread_add.join()
+    thread_reset.join()
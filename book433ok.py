@@ -1,6 +1,8 @@
 from pydantic import BaseModel, ConfigDict
 from enum import Enum
 
+from trusted_model import new, set_dict, set_extra, set_fields_set, set_private
+
 
 class StateType(Enum):
     alive = 1
@@ -12,19 +14,41 @@ class HitPoint(BaseModel):
     amount: int
     MIN: int = 0
 
+    @classmethod
+    def _trusted(cls, amount: int) -> "HitPoint":
+        # HitPoint(amount=...) と同じく MIN は既定値に戻る
+        obj = new(cls)
+        set_dict(obj, {'amount': amount, 'MIN': _HITPOINT_MIN})
+        set_fields_set(obj, {'amount'})
+        set_extra(obj, None)
+        set_private(obj, None)
+        return obj
+
     def damage(self, damage_amount: int) -> "HitPoint":
         next_amount = max(self.amount - damage_amount, self.MIN)
-        return HitPoint(amount=next_amount)
+        return HitPoint._trusted(next_amount)
 
     def is_zero(self) -> bool:
         return self.amount == 0
 
 
+_HITPOINT_MIN = HitPoint.model_fields["MIN"].default
+
+
 class States(BaseModel):
     state: int = StateType.alive.value
 
+    @classmethod
+    def _trusted(cls, state: int) -> "States":
+        obj = new(cls)
+        set_dict(obj, {'state': state})
+        set_fields_set(obj, {'state'})
+        set_extra(obj, None)
+        set_private(obj, None)
+        return obj
+
     def add(self, value: int) -> "States":
-        return States(state=self.state + value)
+        return States._trusted(self.state + value)
 
 
 class Member(BaseModel):
@@ -32,17 +56,27 @@ class Member(BaseModel):
     hitpoint: HitPoint
     states: States
 
+    @classmethod
+    def _trusted(cls, hitpoint: HitPoint, states: States) -> "Member":
+        obj = new(cls)
+        set_dict(obj, {'hitpoint': hitpoint, 'states': states})
+        set_fields_set(obj, {'hitpoint', 'states'})
+        set_extra(obj, None)
+        set_private(obj, None)
+        return obj
+
     def damage(self, damage_amount: int) -> "Member":
         new_hitpoint = self.hitpoint.damage(damage_amount)
         new_states = self.states
         if (new_hitpoint).is_zero():
             new_states = self.states.add(StateType.dead.value)
-        return Member(hitpoint=new_hitpoint, states=new_states)
+        return Member._trusted(new_hitpoint, new_states)
 
 
-member = Member(hitpoint=HitPoint(amount=100), states=States())
+if __name__ == "__main__":
+    member = Member(hitpoint=HitPoint(amount=100), states=States())
 
-member = member.damage(200)
+    member = member.damage(200)
 
-print("HitPoint:", member.hitpoint.amount)
-print("States:", member.states.state)
+    print("HitPoint:", member.hitpoint.amount)
+    print("States:", member.states.state)
@@ -0,0 +1,210 @@
+"""
+good-design の統合コマンドラインエントリポイント
+
+起動を速く保つため、このモジュールでは標準ライブラリの argparse だけを import し、
+pycdlib / pydantic / lief / dissect / lhafile / hexdump などは各サブコマンドの
+実行時に初めて import する。
+
+使用例:
+  good-design iso find test.iso abcdefghij.txt
+  good-design vhd create -s 100 myfile.vhd
+  good-design sfx extract sfx.exe extracted
+  good-design sfx batch drops/ out/
+  good-design scan outer.iso
+  good-design job images/ out/
+  good-design elf info /bin/ls
+  good-design elf triage /usr/bin
+  good-design elf deps /usr/bin/ssh
+  good-design --metrics json sfx batch drops/ out/
+  good-design --profile scan.prof scan outer.iso
+  good-design --profile mem.txt --profile-mode tracemalloc elf scan /usr/bin
+
+--metrics json は終了時に計測値 (カウンタとタイミングスパン) を JSON で標準エラーに出す。
+--profile は cProfile の統計 (pstats 形式) か tracemalloc の上位割り当てをファイルに書く。
+"""
+
+import argparse
+import sys
+
+
+def _iso_find(args) -> int:
+    from pycdlib.pycdlibexception import PyCdlibException
+
+    from isoparse2 import find_and_print_file
+
+    try:
+        find_and_print_file(args.iso_path, args.target_file)
+    except (OSError, ValueError, PyCdlibException) as e:
+        print(f"Error: {args.iso_path}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _sfx_extract(args) -> int:
+    import os
+
+    from lhafile import BadLhafile
+
+    from sfx_extractor import extract_lzh_from_sfx
+
+    try:
+        os.makedirs(args.output_dir, exist_ok=True)
+        for info in extract_lzh_from_sfx(args.sfx_path, args.output_dir):
+            print(f"{info.filename} ({info.file_size} bytes)")
+    except (OSError, ValueError, BadLhafile) as e:
+        print(f"Error: {args.sfx_path}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _elf_info(args) -> int:
+    import json
+
+    from elf_scan import inspect_elf
+
+    info = inspect_elf(args.elf_path)
+    if info is None:
+        print(f"Error: ELF file not found or invalid: {args.elf_path}", file=sys.stderr)
+        return 1
+    print(json.dumps(info, ensure_ascii=False, indent=2))
+    return 0
+
+
+# 既存モジュールの main(argv) に残りの引数をそのまま渡すサブコマンド
+# (-h などのオプションも転送先の parser に任せる)
+FORWARDS = {
+    ('vhd',): ('main2', 'VHD ファイルの作成と管理 (main2.py)'),
+    ('sfx', 'batch'): ('sfx_batch', 'SFX 一括展開 (内容ハッシュで重複排除)'),
+    ('scan',): ('nested_extract', '入れ子コンテナ (SFX / LZH / ISO) の再帰展開'),
+    ('job',): ('extract_job', '中断再開可能な一括展開 (ISO / SFX / LZH)'),
+    ('elf', 'triage'): ('elf_triage', 'ヘッダのみの高速トリアージ'),
+    ('elf', 'scan'): ('elf_scan', 'ELF インベントリスキャン (SQLite キャッシュ)'),
+    ('elf', 'deps'): ('elf_deps', '共有ライブラリ依存グラフ'),
+}
+
+
+def _add_global_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--metrics', choices=['json'], help='終了時に計測値を標準エラーへ出力')
+    parser.add_argument('--profile', metavar='PATH', help='プロファイル結果の出力先')
+    parser.add_argument('--profile-mode', choices=['cprofile', 'tracemalloc'], default='cprofile',
+                        help='プロファイラの種類（デフォルト: cprofile）')
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="good-design",
+        description="ISO / VHD / SFX / ELF ユーティリティ",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="使用例:" + __doc__.split("使用例:", 1)[1].rstrip(),
+    )
+    _add_global_options(parser)
+    commands = parser.add_subparsers(dest='command', metavar='command')
+
+    def add_forward(subparsers, *prefix: str) -> None:
+        # ヘルプ表示用の登録のみ (実際の処理は main で転送する)
+        subparsers.add_parser(prefix[-1], help=FORWARDS[prefix][1], add_help=False)
+
+    # iso
+    iso = commands.add_parser('iso', help='ISO イメージ操作').add_subparsers(dest='iso_command', metavar='command', required=True)
+    iso_find = iso.add_parser('find', help='ISO 内のファイルを探して内容を表示')
+    iso_find.add_argument('iso_path', help='ISO ファイルパス')
+    iso_find.add_argument('target_file', help='探すファイル名')
+    iso_find.set_defaults(func=_iso_find)
+
+    # vhd
+    add_forward(commands, 'vhd')
+
+    # sfx
+    sfx = commands.add_parser('sfx', help='LZH 自己解凍ファイル操作').add_subparsers(dest='sfx_command', metavar='command', required=True)
+    sfx_extract = sfx.add_parser('extract', help='SFX から LZH を展開')
+    sfx_extract.add_argument('sfx_path', help='SFX ファイルパス')
+    sfx_extract.add_argument('output_dir', help='出力ディレクトリ')
+    sfx_extract.set_defaults(func=_sfx_extract)
+    add_forward(sfx, 'sfx', 'batch')
+
+    # scan (入れ子コンテナ)
+    add_forward(commands, 'scan')
+
+    # job (中断再開可能な一括展開)
+    add_forward(commands, 'job')
+
+    # elf
+    elf = commands.add_parser('elf', help='ELF 解析').add_subparsers(dest='elf_command', metavar='command', required=True)
+    elf_info = elf.add_parser('info', help='lief で ELF を解析して表示')
+    elf_info.add_argument('elf_path', help='ELF ファイルパス')
+    elf_info.set_defaults(func=_elf_info)
+    add_forward(elf, 'elf', 'triage')
+    add_forward(elf, 'elf', 'scan')
+    add_forward(elf, 'elf', 'deps')
+
+    return parser
+
+
+def _dispatch(argv: list[str]) -> int:
+    for prefix, (module, _) in FORWARDS.items():
+        if tuple(argv[:len(prefix)]) == prefix:
+            import importlib
+
+            # main が終了コードを返すモジュールはそれを伝える (None は成功扱い)
+            return importlib.import_module(module).main(argv[len(prefix):]) or 0
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not hasattr(args, 'func'):
+        parser.print_help()
+        return 0
+    return args.func(args)
+
+
+def _profiled(argv: list[str], path: str, mode: str) -> int:
+    if mode == 'tracemalloc':
+        import tracemalloc
+
+        tracemalloc.start(25)
+        try:
+            return _dispatch(argv)
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(f"current: {current} bytes, peak: {peak} bytes\n")
+                for stat in snapshot.statistics('lineno')[:50]:
+                    f.write(f"{stat}\n")
+
+    import cProfile
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(_dispatch, argv)
+    finally:
+        profiler.dump_stats(path)
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+
+    # グローバルオプションはサブコマンドより前にだけ置ける (転送先の引数と混ざらないように)
+    pre = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    _add_global_options(pre)
+    split = 0
+    while split < len(argv) and argv[split].startswith('--') and argv[split] != '--':
+        split += 1 if '=' in argv[split] else 2
+    opts, rest = pre.parse_known_args(argv[:split])
+    argv = rest + argv[split:]
+
+    try:
+        if opts.profile:
+            return _profiled(argv, opts.profile, opts.profile_mode)
+        return _dispatch(argv)
+    finally:
+        if opts.metrics == 'json':
+            import json
+
+            import metrics
+
+            print(json.dumps(metrics.snapshot(), indent=2), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
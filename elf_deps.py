@@ -0,0 +1,248 @@
+import argparse
+import glob
+import json
+import os
+from collections import deque
+
+import metrics
+from elf_triage import ElfTriage, triage
+
+LD_SO_CONF = "/etc/ld.so.conf"
+TRUSTED_DIRS = {
+    "ELF64": ["/lib64", "/usr/lib64", "/lib", "/usr/lib"],
+    "ELF32": ["/lib32", "/usr/lib32", "/lib", "/usr/lib"],
+}
+
+
+def read_ld_so_conf(path=LD_SO_CONF, _seen=None) -> list[str]:
+    """ld.so.conf (include を含む) からディレクトリ一覧を読む"""
+    seen = _seen if _seen is not None else set()
+    if path in seen or not os.path.exists(path):
+        return []
+    seen.add(path)
+
+    dirs = []
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            if line.startswith("include "):
+                pattern = line.split(None, 1)[1]
+                if not os.path.isabs(pattern):
+                    pattern = os.path.join(os.path.dirname(path), pattern)
+                for conf in sorted(glob.glob(pattern)):
+                    dirs.extend(read_ld_so_conf(conf, seen))
+            else:
+                dirs.append(line)
+    return dirs
+
+
+def lib_token(interpreter: str | None, elf_class: str) -> str:
+    """
+    $LIB の値を推定する
+
+    glibc の $LIB はビルド時に決まる ld.so 自身の置き場所 (Debian 系なら lib/x86_64-linux-gnu,
+    Fedora 系なら lib64) なので、インタプリタの実体のディレクトリから求める。
+    インタプリタが無い / 見つからない場合は class からの近似値 (lib64 / lib) を使う。
+    """
+    if interpreter:
+        real = os.path.realpath(interpreter)
+        if os.path.isfile(real):
+            directory = os.path.dirname(real)
+            if directory.startswith("/usr/"):
+                directory = directory[len("/usr"):]
+            return directory.lstrip("/")
+    return "lib64" if elf_class == "ELF64" else "lib"
+
+
+def _expand(entry: str, origin: str, lib: str) -> str:
+    # $ORIGIN / $LIB の展開 ($PLATFORM は扱わない)
+    for token, value in (("ORIGIN", origin), ("LIB", lib)):
+        entry = entry.replace("${" + token + "}", value).replace("$" + token, value)
+    return entry
+
+
+def _split_path(value: str | None, origin: str, lib: str) -> tuple[str, ...]:
+    if not value:
+        return ()
+    return tuple(_expand(p, origin, lib) for p in value.split(":") if p)
+
+
+class DependencyGraph:
+    """解決済みの依存関係グラフ (正引き / 逆引き)"""
+
+    def __init__(self):
+        self.roots: list[str] = []
+        self.needs: dict[str, set[str]] = {}  # path -> 依存先 path
+        self.dependents: dict[str, set[str]] = {}  # path -> 依存元 path
+        self.missing: dict[str, set[str]] = {}  # path -> 見つからなかった soname
+        self.sonames: dict[str, str] = {}  # path -> soname (無ければファイル名)
+
+    def add_edge(self, src: str, dst: str) -> None:
+        self.needs.setdefault(src, set()).add(dst)
+        self.dependents.setdefault(dst, set()).add(src)
+
+    def closure(self, path: str) -> set[str]:
+        """path が推移的に依存するライブラリ全体"""
+        result = set()
+        queue = deque(self.needs.get(path, ()))
+        while queue:
+            lib = queue.popleft()
+            if lib in result:
+                continue
+            result.add(lib)
+            queue.extend(self.needs.get(lib, ()))
+        return result
+
+    def who_depends_on(self, name: str, transitive: bool = False) -> set[str]:
+        """soname またはパスで指定したライブラリに依存しているオブジェクト"""
+        targets = {p for p, soname in self.sonames.items() if name in (p, soname)}
+        result = set()
+        queue = deque(targets)
+        while queue:
+            lib = queue.popleft()
+            for src in self.dependents.get(lib, ()):
+                if src not in result:
+                    result.add(src)
+                    if transitive:
+                        queue.append(src)
+        return result
+
+    def to_dict(self) -> dict:
+        return {
+            "roots": self.roots,
+            "needs": {k: sorted(v) for k, v in self.needs.items()},
+            "missing": {k: sorted(v) for k, v in self.missing.items()},
+            "sonames": self.sonames,
+        }
+
+
+class DependencyResolver:
+    """
+    DT_NEEDED の推移的閉包を ld.so と同じ探索順で解決する
+
+    探索順: DT_RPATH (DT_RUNPATH が無い場合のみ、ロード元の RPATH も継承)
+    → LD_LIBRARY_PATH → DT_RUNPATH → ld.so.conf → 既定ディレクトリ。
+    各ライブラリの解析は 1 回だけ、(soname, 探索パス) ごとの探索結果もメモ化する。
+    """
+
+    def __init__(self, default_dirs: list[str] | None = None, ld_library_path: str | None = None):
+        self.default_dirs = default_dirs
+        self.ld_library_path = tuple(p for p in (ld_library_path or "").split(":") if p)
+        self._parsed: dict[str, ElfTriage | None] = {}
+        self._lookups: dict[tuple, str | None] = {}
+        self._default_cache: dict[str, tuple[str, ...]] = {}
+        self.parse_count = 0
+        self.lookup_hits = 0
+
+    def parse(self, path: str) -> ElfTriage | None:
+        real = os.path.realpath(path)
+        if real not in self._parsed:
+            self.parse_count += 1
+            self._parsed[real] = triage(real)
+        return self._parsed[real]
+
+    def _defaults(self, elf_class: str) -> tuple[str, ...]:
+        if elf_class not in self._default_cache:
+            if self.default_dirs is not None:
+                dirs = tuple(self.default_dirs)
+            else:
+                dirs = tuple(read_ld_so_conf()) + tuple(TRUSTED_DIRS.get(elf_class, []))
+            self._default_cache[elf_class] = dirs
+        return self._default_cache[elf_class]
+
+    def find_library(self, soname: str, search_path: tuple[str, ...], requester: ElfTriage) -> str | None:
+        """search_path から requester と同じ class / machine の soname を探す"""
+        key = (soname, search_path, requester.elf_class, requester.machine)
+        if key in self._lookups:
+            self.lookup_hits += 1
+            metrics.incr("cache_hits")
+            return self._lookups[key]
+        metrics.incr("cache_misses")
+
+        found = None
+        for directory in search_path:
+            candidate = os.path.join(directory, soname)
+            if not os.path.isfile(candidate):
+                continue
+            info = self.parse(candidate)
+            if info is not None and (info.elf_class, info.machine) == (requester.elf_class, requester.machine):
+                found = os.path.realpath(candidate)
+                break
+        self._lookups[key] = found
+        return found
+
+    def _search_path(self, info: ElfTriage, path: str, inherited_rpath: tuple[str, ...],
+                     lib: str) -> tuple[tuple[str, ...], tuple[str, ...]]:
+        # (この object の依存探索パス, 子に継承する RPATH) を返す
+        origin = os.path.dirname(path)
+        runpath = _split_path(info.runpath, origin, lib)
+        rpath = () if runpath else _split_path(info.rpath, origin, lib) + inherited_rpath
+        search = rpath + self.ld_library_path + runpath + self._defaults(info.elf_class)
+        return search, rpath
+
+    def resolve(self, binaries) -> DependencyGraph:
+        """binaries 全体の依存グラフを構築する"""
+        graph = DependencyGraph()
+        visited = set()
+        for binary in binaries:
+            root = os.path.realpath(binary)
+            root_info = self.parse(root)
+            if root_info is None:
+                continue
+            graph.roots.append(root)
+            # $LIB はプロセスを読み込む ld.so で決まるので、ルートのインタプリタから求める
+            lib = lib_token(root_info.interpreter, root_info.elf_class)
+            queue = deque([(root, ())])
+            while queue:
+                path, inherited = queue.popleft()
+                if (path, inherited, lib) in visited:
+                    continue
+                visited.add((path, inherited, lib))
+
+                info = self.parse(path)
+                if info is None:
+                    continue
+                graph.sonames.setdefault(path, info.soname or os.path.basename(path))
+                search, rpath = self._search_path(info, path, inherited, lib)
+                for soname in info.needed:
+                    if "/" in soname:
+                        dep = os.path.realpath(soname) if self.parse(soname) else None
+                    else:
+                        dep = self.find_library(soname, search, info)
+                    if dep is None:
+                        graph.missing.setdefault(path, set()).add(soname)
+                        continue
+                    graph.add_edge(path, dep)
+                    queue.append((dep, rpath))
+        return graph
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="共有ライブラリ依存グラフ (DT_NEEDED の推移的閉包)")
+    parser.add_argument('binaries', nargs='+', help='対象の ELF ファイル')
+    parser.add_argument('--who-depends-on', metavar='SONAME', help='指定したライブラリに依存するものを表示')
+    parser.add_argument('--json', action='store_true', help='グラフ全体を JSON で出力')
+    args = parser.parse_args(argv)
+
+    resolver = DependencyResolver(ld_library_path=os.environ.get("LD_LIBRARY_PATH"))
+    graph = resolver.resolve(args.binaries)
+
+    if args.json:
+        print(json.dumps(graph.to_dict(), ensure_ascii=False, indent=2))
+    elif args.who_depends_on:
+        for path in sorted(graph.who_depends_on(args.who_depends_on, transitive=True)):
+            print(path)
+    else:
+        for root in graph.roots:
+            print(f"{root}:")
+            for lib in sorted(graph.closure(root)):
+                print(f"  {graph.sonames.get(lib, lib)} => {lib}")
+            for soname in sorted(graph.missing.get(root, ())):
+                print(f"  {soname} => not found")
+    print(f"Parsed {resolver.parse_count} files, {resolver.lookup_hits} cached lookups")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import argparse
+import functools
+import json
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+import lief
+from lief.ELF import Binary as ELFBinary, DynamicEntry, DynamicEntryFlags, Segment, parse
+
+import metrics
+from elf_triage import ELF_MAGIC, iter_files
+
+DEFAULT_DB = "elf_inventory.db"
+COMMIT_EVERY = 64  # 解析結果をこの件数ごとにコミットする (途中で落ちても失わない)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS elf_inventory (
+    dev      INTEGER NOT NULL,
+    ino      INTEGER NOT NULL,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    path     TEXT NOT NULL,
+    info     TEXT,  -- JSON (ELF でなければ NULL, 解析失敗なら {"error": ...})
+    PRIMARY KEY (dev, ino)
+)
+"""
+
+
+def _dynamic_flags(elf: ELFBinary, tag) -> list:
+    entry = elf.get(tag)
+    return list(entry.flags) if entry is not None else []
+
+
+def _relro(elf: ELFBinary) -> str:
+    if elf.get(Segment.TYPE.GNU_RELRO) is None:
+        return "none"
+    flags = _dynamic_flags(elf, DynamicEntry.TAG.FLAGS) + _dynamic_flags(elf, DynamicEntry.TAG.FLAGS_1)
+    bind_now = (
+        elf.get(DynamicEntry.TAG.BIND_NOW) is not None
+        or DynamicEntryFlags.FLAG.BIND_NOW in flags
+        or DynamicEntryFlags.FLAG.NOW in flags
+    )
+    return "full" if bind_now else "partial"
+
+
+def _entry_value(elf: ELFBinary, tag, attr: str) -> str | None:
+    entry = elf.get(tag)
+    return getattr(entry, attr) if entry is not None else None
+
+
+def inspect_elf(path) -> dict | None:
+    """1 つの ELF を lief で解析して必要な情報だけを辞書で返す (ワーカーで実行)"""
+    lief.logging.disable()
+    with metrics.span("elf.lief_parse"):
+        elf: ELFBinary | None = parse(path)
+    if elf is None:
+        return None
+    metrics.incr("records_parsed")
+
+    header = elf.header
+    imported = sorted({s.name for s in elf.imported_symbols if s.name})
+    exported = sorted({s.name for s in elf.exported_symbols if s.name})
+    return {
+        "arch": header.machine_type.name,
+        "class": header.identity_class.name,
+        "endianness": header.identity_data.name,
+        "type": header.file_type.name,
+        "interpreter": elf.interpreter if elf.has_interpreter else None,
+        "needed": list(elf.libraries),
+        "soname": _entry_value(elf, DynamicEntry.TAG.SONAME, "name"),
+        "rpath": _entry_value(elf, DynamicEntry.TAG.RPATH, "rpath"),
+        "runpath": _entry_value(elf, DynamicEntry.TAG.RUNPATH, "runpath"),
+        "exported": exported,
+        "imported": imported,
+        "security": {
+            "pie": elf.is_pie,
+            "nx": elf.has_nx,
+            "relro": _relro(elf),
+            "canary": "__stack_chk_fail" in imported,
+            "fortify": any(name.endswith("_chk") and name.startswith("__") for name in imported),
+        },
+    }
+
+
+def _inspect_entry(item):
+    path, key = item
+    try:
+        info = inspect_elf(path)
+    except Exception as e:
+        info = {"error": str(e)}
+    return path, key, info
+
+
+def open_db(db_path) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(SCHEMA)
+    return conn
+
+
+def _store(conn: sqlite3.Connection, rows: list) -> None:
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO elf_inventory (dev, ino, size, mtime_ns, path, info) VALUES (?, ?, ?, ?, ?, ?)",
+            [(*key, path, json.dumps(info) if info is not None else None) for path, key, info in rows],
+        )
+    rows.clear()
+
+
+def _prune(conn: sqlite3.Connection, roots, seen: set) -> int:
+    """roots 以下にあったのに今回見つからなかった (削除された) ファイルの行を消す"""
+    prefixes = tuple(root.rstrip("/") + "/" for root in roots)
+    stale = [
+        (dev, ino)
+        for dev, ino, path in conn.execute("SELECT dev, ino, path FROM elf_inventory")
+        if (dev, ino) not in seen and path.startswith(prefixes)
+    ]
+    with conn:
+        conn.executemany("DELETE FROM elf_inventory WHERE dev = ? AND ino = ?", stale)
+    return len(stale)
+
+
+def scan(roots, db_path=DEFAULT_DB, workers=None) -> dict:
+    """
+    ディレクトリを走査して ELF 情報を SQLite に保存する
+
+    (dev, inode, size, mtime) が前回と同じファイルは再解析しない (解析失敗した行は毎回やり直す)。
+    結果は COMMIT_EVERY 件ごとにコミットするので、中断しても次回は続きから再開できる。
+    走査が最後まで終わったら、roots 以下で見つからなかったファイルの行を削除する。
+
+    Args:
+        roots: 走査するディレクトリのリスト
+        db_path: SQLite ファイルのパス
+        workers: ワーカープロセス数 (None で CPU 数)
+
+    Returns:
+        {"files", "cached", "parsed", "removed"} の件数
+    """
+    conn = open_db(db_path)
+    known = {
+        (dev, ino): (size, mtime_ns)
+        for dev, ino, size, mtime_ns in conn.execute(
+            "SELECT dev, ino, size, mtime_ns FROM elf_inventory"
+            " WHERE info IS NULL OR json_extract(info, '$.error') IS NULL"
+        )
+    }
+
+    seen = set()
+    pending = []
+    non_elf = []
+    cached = 0
+    for path, st in iter_files(roots):
+        ident = (st.st_dev, st.st_ino)
+        if ident in seen:  # ハードリンクは 1 回だけ
+            continue
+        seen.add(ident)
+        key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+        if known.get(ident) == (st.st_size, st.st_mtime_ns):
+            cached += 1
+            metrics.incr("cache_hits")
+            continue
+        metrics.incr("cache_misses")
+        try:
+            with open(path, 'rb') as f:
+                magic = f.read(4)
+        except OSError as e:
+            # 読めないだけで ELF かもしれないので、エラー行として残して次回やり直す
+            non_elf.append((path, key, {"error": str(e)}))
+            continue
+        if magic == ELF_MAGIC:
+            pending.append((path, key))
+        else:
+            non_elf.append((path, key, None))
+
+    print(f"Files: {len(seen)}, cached: {cached}, to parse: {len(pending)}")
+
+    rows = non_elf
+    try:
+        if pending:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for row, worker_metrics in pool.map(functools.partial(metrics.collect, _inspect_entry), pending, chunksize=16):
+                    rows.append(row)
+                    metrics.merge(worker_metrics)
+                    if len(rows) >= COMMIT_EVERY:
+                        _store(conn, rows)
+        _store(conn, rows)
+        removed = _prune(conn, roots, seen)
+    finally:
+        # ワーカーが落ちた (BrokenProcessPool) / 中断された場合も、そこまでの結果は残す
+        if rows:
+            _store(conn, rows)
+        conn.close()
+    return {"files": len(seen), "cached": cached, "parsed": len(pending), "removed": removed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ELF インベントリスキャナ (SQLite キャッシュ付き)")
+    parser.add_argument('roots', nargs='+', help='走査するディレクトリ (例: /usr/bin /usr/lib)')
+    parser.add_argument('--db', default=DEFAULT_DB, help=f'SQLite ファイル（デフォルト: {DEFAULT_DB}）')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='ワーカー数（デフォルト: CPU数）')
+    args = parser.parse_args(argv)
+
+    scan(args.roots, db_path=args.db, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+
+import metrics
+
+ELF_MAGIC = b'\x7fELF'
+
+# e_ident
+EI_CLASS = 4
+EI_DATA = 5
+ELFCLASS = {1: "ELF32", 2: "ELF64"}
+ELFDATA = {1: "LSB", 2: "MSB"}
+
+# e_type / e_machine (名前は lief の enum 名に合わせる)
+FILE_TYPES = {0: "NONE", 1: "REL", 2: "EXEC", 3: "DYN", 4: "CORE"}
+MACHINES = {
+    2: "SPARC", 3: "I386", 8: "MIPS", 20: "PPC", 21: "PPC64", 22: "S390",
+    40: "ARM", 43: "SPARCV9", 50: "IA_64", 62: "X86_64", 183: "AARCH64",
+    243: "RISCV", 258: "LOONGARCH",
+}
+
+# p_type
+PT_LOAD = 1
+PT_DYNAMIC = 2
+PT_INTERP = 3
+
+# d_tag
+DT_NULL = 0
+DT_NEEDED = 1
+DT_STRTAB = 5
+DT_STRSZ = 10
+DT_SONAME = 14
+DT_RPATH = 15
+DT_RUNPATH = 29
+
+# (ヘッダ, プログラムヘッダ, 動的エントリ) の struct 書式 (エンディアン記号は後で付ける)
+LAYOUTS = {
+    1: ("HHIIIIIHHHHHH", "IIIIIIII", "iI"),
+    2: ("HHIQQQIHHHHHH", "IIQQQQQQ", "qQ"),
+}
+
+
+@dataclass(slots=True)
+class ElfTriage:
+    """ELF ヘッダ・プログラムヘッダ・動的セクションだけから得られる情報"""
+
+    path: str
+    elf_class: str
+    endianness: str
+    type: str
+    machine: str
+    interpreter: str | None = None
+    needed: list[str] = field(default_factory=list)
+    soname: str | None = None
+    rpath: str | None = None
+    runpath: str | None = None
+
+    def inspect(self) -> dict | None:
+        """シンボルやセキュリティフラグが必要な場合だけ lief による完全解析にエスカレートする"""
+        from elf_scan import inspect_elf
+
+        return inspect_elf(self.path)
+
+
+def _cstring(buf, offset: int) -> str:
+    end = buf.find(b'\x00', offset)
+    if end == -1:
+        end = len(buf)
+    return bytes(buf[offset:end]).decode("utf-8", errors="replace")
+
+
+def _vaddr_to_offset(loads, vaddr: int) -> int | None:
+    for p_offset, p_vaddr, p_filesz in loads:
+        if p_vaddr <= vaddr < p_vaddr + p_filesz:
+            return vaddr - p_vaddr + p_offset
+    return None
+
+
+def triage_buffer(buf, path: str = "") -> ElfTriage | None:
+    """bytes / mmap から ELF を軽量に解析する。ELF でなければ None"""
+    if len(buf) < 52 or buf[:4] != ELF_MAGIC:
+        return None
+    elf_class = buf[EI_CLASS]
+    data = buf[EI_DATA]
+    if elf_class not in LAYOUTS or data not in ELFDATA:
+        return None
+
+    endian = "<" if data == 1 else ">"
+    ehdr_fmt, phdr_fmt, dyn_fmt = (endian + f for f in LAYOUTS[elf_class])
+    ehdr_size = struct.calcsize(ehdr_fmt)
+    if len(buf) < 16 + ehdr_size:
+        return None
+    (e_type, e_machine, _, _, e_phoff, _, _, _,
+     e_phentsize, e_phnum, _, _, _) = struct.unpack_from(ehdr_fmt, buf, 16)
+
+    info = ElfTriage(
+        path=path,
+        elf_class=ELFCLASS[elf_class],
+        endianness=ELFDATA[data],
+        type=FILE_TYPES.get(e_type, str(e_type)),
+        machine=MACHINES.get(e_machine, str(e_machine)),
+    )
+
+    # プログラムヘッダから PT_LOAD / PT_INTERP / PT_DYNAMIC を拾う
+    loads = []
+    dynamic = None
+    for i in range(e_phnum):
+        off = e_phoff + i * e_phentsize
+        if off + struct.calcsize(phdr_fmt) > len(buf):
+            break
+        fields = struct.unpack_from(phdr_fmt, buf, off)
+        if elf_class == 1:
+            p_type, p_offset, p_vaddr, _, p_filesz = fields[:5]
+        else:
+            p_type, _, p_offset, p_vaddr, _, p_filesz = fields[:6]
+        if p_type == PT_LOAD:
+            loads.append((p_offset, p_vaddr, p_filesz))
+        elif p_type == PT_INTERP:
+            info.interpreter = _cstring(buf[p_offset:p_offset + p_filesz], 0)
+        elif p_type == PT_DYNAMIC:
+            dynamic = (p_offset, p_filesz)
+
+    if dynamic is None:
+        return info
+
+    # 動的セクション: 文字列は DT_STRTAB (仮想アドレス) からのオフセット
+    entries = []
+    strtab = None
+    dyn_size = struct.calcsize(dyn_fmt)
+    dyn_offset, dyn_filesz = dynamic
+    for off in range(dyn_offset, min(dyn_offset + dyn_filesz, len(buf)) - dyn_size + 1, dyn_size):
+        tag, val = struct.unpack_from(dyn_fmt, buf, off)
+        if tag == DT_NULL:
+            break
+        if tag == DT_STRTAB:
+            strtab = _vaddr_to_offset(loads, val)
+        elif tag in (DT_NEEDED, DT_SONAME, DT_RPATH, DT_RUNPATH):
+            entries.append((tag, val))
+
+    if strtab is None:
+        return info
+    for tag, val in entries:
+        name = _cstring(buf, strtab + val)
+        if tag == DT_NEEDED:
+            info.needed.append(name)
+        elif tag == DT_SONAME:
+            info.soname = name
+        elif tag == DT_RPATH:
+            info.rpath = name
+        elif tag == DT_RUNPATH:
+            info.runpath = name
+    return info
+
+
+def triage(path) -> ElfTriage | None:
+    """ファイルを mmap して必要な部分だけを読む。ELF でなければ None"""
+    try:
+        with open(path, 'rb') as f:
+            if f.read(4) != ELF_MAGIC:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                metrics.incr("records_parsed")
+                return triage_buffer(mm, str(path))
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def is_elf(path) -> bool:
+    try:
+        with open(path, 'rb') as f:
+            return f.read(4) == ELF_MAGIC
+    except OSError:
+        return False
+
+
+def iter_files(roots):
+    """roots 以下の通常ファイルを (path, stat) で列挙する (シンボリックリンクは辿らない)"""
+    stack = list(roots)
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            yield entry.path, entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+        except (NotADirectoryError, PermissionError, FileNotFoundError):
+            continue
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ELF 高速トリアージ (ヘッダのみ解析)")
+    parser.add_argument('paths', nargs='+', help='ファイルまたはディレクトリ')
+    parser.add_argument('--full', action='store_true', help='lief による完全解析も行う')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    count = 0
+    for p in args.paths:
+        files = [p] if os.path.isfile(p) else (path for path, _ in iter_files([p]))
+        for path in files:
+            info = triage(path)
+            if info is None:
+                continue
+            count += 1
+            record = asdict(info)
+            if args.full:
+                record["full"] = info.inspect()
+            print(json.dumps(record, ensure_ascii=False))
+    elapsed = time.perf_counter() - start
+    print(f"Triaged {count} ELF files in {elapsed:.3f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+中断しても続きから再開できる一括展開ジョブ (ISO / SFX / LZH)
+
+展開先ルートに checkpoint.jsonl を置き、展開し終えたメンバーとイメージを 1 行ずつ追記する。
+
+  {"image": "disks/a.iso", "key": "<size>:<mtime_ns>", "done": false}      イメージの展開開始
+  {"image": "disks/a.iso", "member": "README.TXT", "offset": 65536,
+   "size": 10, "sha256": "..."}                                           メンバーの展開完了
+  {"image": "disks/a.iso", "key": "<size>:<mtime_ns>", "done": true, "members": 3}
+
+offset はイメージ先頭からメンバーのデータまでのバイト位置。
+再実行時は出力ファイルをサイズ (stat) → SHA-256 の順に確認し、一致したものは展開し直さない。
+元イメージの (サイズ, mtime) が変わっていた場合は、そのイメージを最初から展開し直す。
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import sys
+from pathlib import Path, PurePosixPath
+
+import lhafile
+from pycdlib.pycdlib import PyCdlib
+
+import metrics
+from file_util import CHUNK_SIZE, file_key, hash_file
+from isoparse2 import select_path_type
+from nested_extract import OffsetView, detect_container
+from sfx_extractor import find_lzh_offset, safe_member_path
+
+JOURNAL_NAME = "checkpoint.jsonl"
+
+
+class Journal:
+    """
+    追記専用のチェックポイントファイル
+
+    各行はメンバー 1 つ分で書き込みのたびに flush する (イメージ完了時は fsync)。
+    落ちた瞬間に書きかけだった最終行は読み込み時に捨てる。
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.images: dict[str, dict] = {}
+        self.members: dict[str, dict[str, dict]] = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        self._apply(json.loads(line))
+                    except json.JSONDecodeError:
+                        break
+        self._compact()
+        self._fp = open(self.path, 'a', encoding='utf-8')
+
+    def _apply(self, entry: dict) -> None:
+        image = entry["image"]
+        if "member" in entry:
+            self.members.setdefault(image, {})[entry["member"]] = entry
+            return
+        previous = self.images.get(image)
+        if previous is not None and previous["key"] != entry["key"]:
+            # 元イメージが変わった: 以前のメンバー記録は無効
+            self.members.pop(image, None)
+        self.images[image] = entry
+
+    def _compact(self) -> None:
+        # 最新の状態だけを書き直してファイルを小さく保つ (一時ファイル経由で置き換え)
+        tmp_path = self.path.with_suffix('.jsonl.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for image, entry in self.images.items():
+                f.write(json.dumps({**entry, "done": False}, ensure_ascii=False) + "\n")
+                for member in self.members.get(image, {}).values():
+                    f.write(json.dumps(member, ensure_ascii=False) + "\n")
+                if entry["done"]:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def record(self, entry: dict, sync: bool = False) -> None:
+        self._apply(entry)
+        self._fp.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._fp.flush()
+        if sync:
+            os.fsync(self._fp.fileno())
+
+    def close(self) -> None:
+        self._fp.close()
+
+
+def verify_output(path, size: int, sha256: str, mode: str = "hash") -> bool:
+    """出力ファイルが記録どおりか確認する。まず stat でサイズを比べ、mode が "hash" ならハッシュも比べる"""
+    try:
+        if os.path.getsize(path) != size:
+            return False
+    except OSError:
+        return False
+    if mode == "size":
+        return True
+    return hash_file(path) == sha256
+
+
+def _iter_lzh_members(fp, start: int, length: int):
+    archive = lhafile.Lhafile(OffsetView(fp, start, length))
+    for info in archive.infolist():
+        # lhafile は 1 メンバー丸ごとの読み出ししかできない
+        yield info.filename, start + info.file_offset, info.file_size, lambda name=info.filename: [archive.read(name)]
+
+
+def _iter_sfx_members(fp, size: int):
+    start = find_lzh_offset(fp)
+    if start == -1:
+        raise ValueError("Valid LZH header not found in SFX file")
+    yield from _iter_lzh_members(fp, start, size - start)
+
+
+def _iter_iso_members(fp, size: int):
+    iso = PyCdlib()
+    iso.open_fp(fp)
+    try:
+        path_type = select_path_type(iso)
+        for parent_path, _, files in iso.walk(**{path_type: "/"}):
+            for f in files:
+                full_path = str(PurePosixPath(parent_path) / f)
+                record = iso.get_record(**{path_type: full_path})
+
+                def chunks(full_path=full_path):
+                    with iso.open_file_from_iso(**{path_type: full_path}) as member:
+                        while chunk := member.read(CHUNK_SIZE):
+                            yield chunk
+
+                yield (full_path.lstrip("/"), record.extent_location() * iso.logical_block_size,
+                       record.get_data_length(), chunks)
+    finally:
+        iso.close()
+
+
+MEMBER_ITERATORS = {
+    "sfx": _iter_sfx_members,
+    "lzh": lambda fp, size: _iter_lzh_members(fp, 0, size),
+    "iso": _iter_iso_members,
+}
+
+
+def _write_member(dest: Path, chunks) -> tuple[int, str]:
+    # .part に書いてから置き換えるので、途中で落ちても完成品と区別できる
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dest.with_name(dest.name + ".part")
+    h = hashlib.sha256()
+    size = 0
+    with open(tmp_path, 'wb') as f:
+        for chunk in chunks:
+            f.write(chunk)
+            h.update(chunk)
+            size += len(chunk)
+    os.replace(tmp_path, dest)
+    metrics.incr("records_parsed")
+    metrics.incr("bytes_written", size)
+    return size, h.hexdigest()
+
+
+def _needs_extract(journal: Journal, image: str, out_dir: Path, verify: str) -> list[str]:
+    """完了済みイメージのうち、出力が記録と合わないメンバー名を返す"""
+    return [
+        name for name, entry in journal.members.get(image, {}).items()
+        if not verify_output(safe_member_path(out_dir, name), entry["size"], entry["sha256"], verify)
+    ]
+
+
+def extract_image(image_path, image: str, out_dir: Path, journal: Journal, verify: str = "hash") -> dict:
+    """
+    1 つのイメージを out_dir に展開する。ジャーナルにあって出力が一致するメンバーは飛ばす
+
+    Returns:
+        {"extracted": 展開したメンバー数, "verified": 確認だけで済んだメンバー数}
+    """
+    key = file_key(image_path)
+    state = journal.images.get(image)
+    bad = None  # 確認済みで展開し直しが必要なメンバー (None なら未確認)
+    if state is not None and state["key"] == key and state["done"]:
+        # 完了済み: 出力を確認するだけで、問題なければイメージを開かない
+        bad = set(_needs_extract(journal, image, out_dir, verify))
+        if not bad:
+            verified = len(journal.members.get(image, {}))
+            metrics.incr("cache_hits", verified)
+            return {"extracted": 0, "verified": verified}
+
+    extracted = verified = 0
+    with open(image_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            kind = detect_container(mm)
+            if kind is None:
+                raise ValueError("Unknown container format")
+            if state is None or state["key"] != key or state["done"]:
+                journal.record({"image": image, "key": key, "done": False})
+            done = journal.members.get(image, {})
+            for name, offset, member_size, chunks in MEMBER_ITERATORS[kind](mm, size):
+                dest = Path(safe_member_path(out_dir, name))
+                entry = done.get(name)
+                if (entry is not None and entry["offset"] == offset and entry["size"] == member_size
+                        and (name not in bad if bad is not None
+                             else verify_output(dest, entry["size"], entry["sha256"], verify))):
+                    metrics.incr("cache_hits")
+                    verified += 1
+                    continue
+                metrics.incr("cache_misses")
+                written, digest = _write_member(dest, chunks())
+                journal.record({"image": image, "member": name, "offset": offset,
+                                "size": written, "sha256": digest})
+                extracted += 1
+
+    journal.record({"image": image, "key": key, "done": True, "members": extracted + verified}, sync=True)
+    return {"extracted": extracted, "verified": verified}
+
+
+def run_job(input_dir, output_root, patterns=("*.iso", "*.exe", "*.lzh"), verify: str = "hash") -> dict:
+    """
+    input_dir 以下のイメージを output_root/<相対パス>/ に展開する (中断後は続きから)
+
+    Args:
+        input_dir: ISO / SFX / LZH を含むディレクトリ
+        output_root: 展開先ルート (checkpoint.jsonl もここに置く)
+        patterns: 対象ファイルの glob パターン
+        verify: 完了済み出力の確認方法 ("hash": サイズ + SHA-256, "size": サイズのみ)
+
+    Returns:
+        {"images", "skipped", "extracted", "verified", "errors"} の件数
+
+    Raises:
+        NotADirectoryError: input_dir がディレクトリでない (この場合は output_root も作らない)
+    """
+    input_dir = Path(input_dir)
+    if not input_dir.is_dir():
+        raise NotADirectoryError(f"Input directory not found: {input_dir}")
+    output_root = Path(output_root)
+    output_root.mkdir(parents=True, exist_ok=True)
+    journal = Journal(output_root / JOURNAL_NAME)
+
+    paths = sorted({p for pattern in patterns for p in input_dir.rglob(pattern) if p.is_file()})
+    summary = {"images": len(paths), "skipped": 0, "extracted": 0, "verified": 0, "errors": 0}
+    try:
+        for path in paths:
+            image = path.relative_to(input_dir).as_posix()
+            try:
+                result = extract_image(path, image, output_root / image, journal, verify)
+            except Exception as e:
+                print(f"Error: {image}: {e}")
+                summary["errors"] += 1
+                continue
+            if result["extracted"] == 0:
+                summary["skipped"] += 1
+            else:
+                print(f"Extracted: {image} ({result['extracted']} new, {result['verified']} verified)")
+            summary["extracted"] += result["extracted"]
+            summary["verified"] += result["verified"]
+    finally:
+        journal.close()
+    return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="中断再開可能な一括展開 (ISO / SFX / LZH)")
+    parser.add_argument('input_dir', help='イメージを含むディレクトリ')
+    parser.add_argument('output_dir', help='展開先ルートディレクトリ (checkpoint.jsonl を作成)')
+    parser.add_argument('-p', '--pattern', action='append', help='対象ファイルの glob（複数可, デフォルト: *.iso *.exe *.lzh）')
+    parser.add_argument('--verify', choices=['hash', 'size'], default='hash',
+                        help='完了済み出力の確認方法（デフォルト: hash）')
+    args = parser.parse_args(argv)
+
+    try:
+        summary = run_job(args.input_dir, args.output_dir,
+                          patterns=args.pattern or ("*.iso", "*.exe", "*.lzh"), verify=args.verify)
+    except NotADirectoryError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"Images: {summary['images']}, skipped: {summary['skipped']}, errors: {summary['errors']}, "
+          f"members extracted: {summary['extracted']}, verified: {summary['verified']}")
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
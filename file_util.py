@@ -0,0 +1,27 @@
+import hashlib
+import os
+
+import metrics
+
+CHUNK_SIZE = 1024 * 1024  # ハッシュ計算時の読み込み単位 (1MB)
+
+
+def file_key(path) -> str:
+    # (サイズ, mtime) が変わっていなければ内容も変わっていないとみなすためのキー
+    st = os.stat(path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def hash_stream(fp, chunk_size=CHUNK_SIZE) -> str:
+    """ファイルオブジェクトの現在位置から末尾までをチャンク単位で読み、SHA-256 を返す"""
+    h = hashlib.sha256()
+    while chunk := fp.read(chunk_size):
+        h.update(chunk)
+        metrics.incr("bytes_read", len(chunk))
+    return h.hexdigest()
+
+
+def hash_file(path, chunk_size=CHUNK_SIZE) -> str:
+    """ファイル全体を読み込まずにチャンク単位で SHA-256 を計算する"""
+    with open(path, 'rb') as f:
+        return hash_stream(f, chunk_size)
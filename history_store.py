@@ -0,0 +1,222 @@
+import json
+import sys
+import zlib
+from typing import Callable, Iterator
+
+from pydantic import BaseModel
+from pydantic_core import to_jsonable_python
+
+
+class Version[T]:
+    """
+    履歴の 1 バージョン (不変)。親へのポインタとスキップ用のジャンプポインタを持つ
+
+    ジャンプポインタは skew-binary 方式で張るので、任意の祖先へ O(log n) で辿れる。
+    """
+
+    __slots__ = ("value", "parent", "jump", "depth")
+
+    def __init__(self, value: T, parent: "Version[T] | None" = None):
+        self.value = value
+        self.parent = parent
+        if parent is None:
+            self.depth = 0
+            self.jump = self
+        else:
+            self.depth = parent.depth + 1
+            jump = parent.jump
+            if parent.depth - jump.depth == jump.depth - jump.jump.depth:
+                self.jump = jump.jump
+            else:
+                self.jump = parent
+
+    def ancestor(self, depth: int) -> "Version[T]":
+        """depth 番目 (0 が最初) の祖先を返す"""
+        if not 0 <= depth <= self.depth:
+            raise IndexError(f"version {depth} out of range (0..{self.depth})")
+        node = self
+        while node.depth > depth:
+            node = node.jump if node.jump.depth >= depth else node.parent
+        return node
+
+    def __iter__(self) -> Iterator[T]:
+        """最初から自分までの値を順に返す"""
+        chain = []
+        node = self
+        while node is not None:
+            chain.append(node.value)
+            node = node.parent
+        return reversed(chain)
+
+
+def share_structure[T](prev: T, new: T) -> T:
+    """
+    new のうち prev と等しい部分オブジェクトを prev のインスタンスに置き換える
+
+    Member.damage のように states を使い回すコードなら何もしないが、
+    新しく作り直された等しいサブオブジェクトも共有されるようにする。
+    """
+    if prev is new:
+        return prev
+    if not isinstance(new, BaseModel):
+        return prev if type(prev) is type(new) and prev == new else new
+    if type(prev) is not type(new):
+        return new
+
+    changed = {}
+    same = True
+    for name in type(new).model_fields:
+        old_field = prev.__dict__[name]
+        new_field = new.__dict__[name]
+        shared = share_structure(old_field, new_field)
+        if shared is not new_field:
+            changed[name] = shared
+        if shared is not old_field:
+            same = False
+    if same:
+        return prev
+    return new.model_copy(update=changed) if changed else new
+
+
+def _encode(values: list) -> tuple:
+    """
+    モデルのグラフを (クラス表, オブジェクト表, 各バージョンの参照) の素朴なタプルにする (JSON 化できる形)
+
+    同一のサブオブジェクトはオブジェクト表に 1 回だけ入る。
+    オブジェクト表の要素は (クラス番号, 参照フィールドのビットマスク, フィールド値)。
+    """
+    classes: list[tuple] = []
+    class_index: dict[type, tuple[int, tuple[str, ...]]] = {}
+    objects: list[tuple] = []
+    memo: dict[int, int] = {}
+
+    def ref(obj: BaseModel) -> int:
+        index = memo.get(id(obj))
+        if index is not None:
+            return index
+        cls = type(obj)
+        entry = class_index.get(cls)
+        if entry is None:
+            names = tuple(cls.model_fields)
+            entry = class_index[cls] = (len(classes), names)
+            classes.append((cls.__module__, cls.__qualname__, names))
+        c, names = entry
+        mask = 0
+        fields = []
+        for i, name in enumerate(names):
+            v = obj.__dict__[name]
+            if isinstance(v, BaseModel):
+                mask |= 1 << i
+                v = ref(v)
+            fields.append(v)
+        index = memo[id(obj)] = len(objects)
+        objects.append((c, mask, tuple(fields)))
+        return index
+
+    refs = [ref(v) for v in values]
+    return classes, objects, refs
+
+
+def _decode(classes: list, objects: list, refs: list) -> list:
+    # データ側の指定でモジュールを import させないよう、読み込み済みのモジュールからだけ探す
+    resolved = []
+    for module, qualname, names in classes:
+        cls = sys.modules.get(module)
+        if cls is None:
+            raise TypeError(f"module {module} is not loaded")
+        for part in qualname.split("."):
+            cls = getattr(cls, part)
+        if not (isinstance(cls, type) and issubclass(cls, BaseModel)):
+            raise TypeError(f"{module}.{qualname} is not a pydantic model")
+        resolved.append((cls, names))
+
+    built = []
+    for c, mask, fields in objects:
+        cls, names = resolved[c]
+        kwargs = {
+            name: built[v] if mask >> i & 1 else v
+            for i, (name, v) in enumerate(zip(names, fields))
+        }
+        built.append(cls(**kwargs))
+    return [built[r] for r in refs]
+
+
+class VersionedStore[T]:
+    """
+    frozen なモデルの全履歴を保持するストア
+
+    - commit / snapshot は O(1) (スナップショットは Version そのもの)
+    - 任意のバージョンへのアクセスは O(log n)
+    - 変更のないサブオブジェクトはバージョン間で共有する
+    - checkout で過去のバージョンに戻ってから commit すると履歴が分岐する (元の枝は残る)
+    """
+
+    def __init__(self, initial: T):
+        self.head: Version[T] = Version(initial)
+
+    @property
+    def value(self) -> T:
+        return self.head.value
+
+    def __len__(self) -> int:
+        return self.head.depth + 1
+
+    def __getitem__(self, index: int) -> T:
+        if index < 0:
+            index += len(self)
+        return self.head.ancestor(index).value
+
+    def commit(self, value: T) -> Version[T]:
+        self.head = Version(share_structure(self.head.value, value), self.head)
+        return self.head
+
+    def update(self, func: Callable[[T], T]) -> Version[T]:
+        """func(現在の値) を新しいバージョンとして記録する (例: store.update(lambda m: m.damage(10)))"""
+        return self.commit(func(self.head.value))
+
+    def snapshot(self) -> Version[T]:
+        return self.head
+
+    def checkout(self, version: Version[T] | int) -> Version[T]:
+        """指定したバージョン (Version または番号) を head にする"""
+        if isinstance(version, int):
+            version = self.head.ancestor(version)
+        self.head = version
+        return self.head
+
+    def undo(self, steps: int = 1) -> Version[T]:
+        return self.checkout(self.head.depth - steps)
+
+    def dumps(self, version: Version[T] | None = None) -> bytes:
+        """
+        version (既定は head) までの履歴をバイト列にする
+
+        共有されたサブオブジェクトは 1 回だけ書き、素朴なタプルにしてから
+        JSON + zlib で圧縮する。loads ではモデルのコンストラクタ (検証付き) で組み立て直す。
+        """
+        values = list(version or self.head)
+        data = json.dumps(_encode(values), separators=(",", ":"), default=to_jsonable_python)
+        return zlib.compress(data.encode("utf-8"))
+
+    @classmethod
+    def loads(cls, data: bytes) -> "VersionedStore[T]":
+        values = _decode(*json.loads(zlib.decompress(data)))
+        store = cls(values[0])
+        for value in values[1:]:
+            store.head = Version(value, store.head)
+        return store
+
+
+if __name__ == "__main__":
+    from book433ok import HitPoint, Member, States
+
+    store = VersionedStore(Member(hitpoint=HitPoint(amount=100_000), states=States()))
+    for _ in range(100_000):
+        store.update(lambda m: m.damage(1))
+
+    data = store.dumps()
+    print(f"Versions: {len(store)}, serialized: {len(data)} bytes")
+    print("Version 500:", store[500].hitpoint.amount)
+    print("States shared:", store[0].states is store[-1].states)
+    restored = VersionedStore.loads(data)
+    print("Restored:", len(restored), restored[500] == store[500])
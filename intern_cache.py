@@ -0,0 +1,81 @@
+import threading
+from collections import OrderedDict
+
+from pydantic import BaseModel
+
+
+class InternCache:
+    """
+    frozen な pydantic モデルの Flyweight キャッシュ
+
+    同じ値のインスタンスを共有して、長く保持するオブジェクトのメモリを減らす。
+    上限付きの LRU で、スレッドセーフ (free-threaded ビルドでも安全)。
+
+    ヒットしてもキー作成とロックのぶん pydantic-core での生成より遅い (実測で約 1.5 倍) ので、
+    ホットループの中では呼ばず、ループ外で 1 回インターンした値を使い回すこと。
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict = OrderedDict()
+        self._checked: set[type] = set()
+        self._lock = threading.Lock()
+
+    def _check(self, cls: type[BaseModel]) -> None:
+        if not cls.model_config.get("frozen"):
+            raise TypeError(f"{cls.__name__} is not frozen; only immutable models can be interned")
+        with self._lock:
+            self._checked.add(cls)
+
+    def intern[M: BaseModel](self, cls: type[M], **values) -> M:
+        """values と等しい cls のインスタンスを返す。キャッシュに無ければ (検証付きで) 生成して登録する"""
+        if cls not in self._checked:
+            self._check(cls)
+        # キーは呼び出し側のキーワード順のまま (sorted しない)。
+        # 同じ呼び出し箇所では順序が変わらないので、順序違いは別エントリになるだけで結果は正しい。
+        # True == 1 == 1.0 は同じハッシュになるので、型もキーに入れて検証を素通りさせない
+        key = (cls, *((name, type(v), v) for name, v in values.items()))
+        try:
+            with self._lock:
+                obj = self._items.get(key)
+                if obj is not None:
+                    self._items.move_to_end(key)
+                    self.hits += 1
+                    return obj
+        except TypeError:
+            # ハッシュできない値 (frozen でない入れ子モデルなど) はキャッシュしない
+            key = None
+
+        # 生成 (検証) はロックの外で行う
+        obj = cls(**values)
+        with self._lock:
+            self.misses += 1
+            if key is None:
+                return obj
+            # 他スレッドが先に登録していればそちらを共有する
+            existing = self._items.setdefault(key, obj)
+            self._items.move_to_end(key)
+            if len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return existing
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._items), "maxsize": self.maxsize}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# 既定の共有キャッシュ
+default_cache = InternCache()
+
+
+def intern[M: BaseModel](cls: type[M], **values) -> M:
+    """既定キャッシュで cls(**values) をインターンする"""
+    return default_cache.intern(cls, **values)
@@ -4,6 +4,8 @@ from pathlib import PurePosixPath
 from pycdlib.pycdlib import PyCdlib
 from pydantic import BaseModel, ConfigDict, Field
 
+import metrics
+
 
 class iso_util(BaseModel, frozen=True):
     model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -29,6 +31,7 @@ class iso_util(BaseModel, frozen=True):
         except Exception:
             pass
 
+    @metrics.timed("iso.find_iso")
     def find_iso(self, target_file: str, path_type: str = "iso_path") -> bool:
         """指定された `target_file` を ISO 内で検索し、見つかれば内容を表示する。"""
         if not self.iso:
@@ -37,6 +40,7 @@ class iso_util(BaseModel, frozen=True):
         target_lower = target_file.lower()
 
         for parent_path, _, files in self.iso.walk(**{path_type: "/"}):
+            metrics.incr("records_parsed", len(files))
             for f in files:
                 if f.lower() == target_lower:
                     full_path = str(PurePosixPath(parent_path) / f)
@@ -45,6 +49,7 @@ class iso_util(BaseModel, frozen=True):
                     try:
                         with self.iso.open_file_from_iso(**{path_type: full_path}) as fd:
                             content = fd.read()
+                            metrics.incr("bytes_read", len(content))
                             print("----- File Content -----")
                             try:
                                 print(content.decode("utf-8", errors="ignore"))
@@ -3,6 +3,8 @@ from pathlib import PurePosixPath
 from pycdlib.pycdlib import PyCdlib
 from pycdlib.dr import DirectoryRecord
 
+import metrics
+
 
 def print_file(iso: PyCdlib, dr: DirectoryRecord, path_type: str) -> None:
     """ディレクトリレコードからフルパスを取得して内容を表示"""
@@ -16,12 +18,14 @@ def print_file(iso: PyCdlib, dr: DirectoryRecord, path_type: str) -> None:
         print("-----------------------")
 
 
+@metrics.timed("iso.find_iso")
 def find_iso(iso: PyCdlib, target_file: str, path_type: str) -> bool:
     """ISO 内を探索して target_file を見つけたら内容表示"""
     target_lower = target_file.lower()
 
     for parent_path, _, files in iso.walk(**{path_type: "/"}):
         # walk() で返されたファイル名リストから直接マッチさせる
+        metrics.incr("records_parsed", len(files))
         for f in files:
             if f.lower() == target_lower:
                 # フルパスを構築して open_file_from_iso を使用
@@ -31,6 +35,7 @@ def find_iso(iso: PyCdlib, target_file: str, path_type: str) -> bool:
                 try:
                     with iso.open_file_from_iso(**{path_type: full_path}) as fd:
                         content = fd.read()
+                        metrics.incr("bytes_read", len(content))
                         print("----- File Content -----")
                         print(content.decode("utf-8", errors="ignore"))
                         print("-----------------------")
@@ -41,17 +46,20 @@ def find_iso(iso: PyCdlib, target_file: str, path_type: str) -> bool:
     return False
 
 
+def select_path_type(iso: PyCdlib) -> str:
+    """ISO が持つ名前空間のうち最も情報の多いものを返す (Rock Ridge > Joliet > ISO 9660)"""
+    if iso.has_rock_ridge():
+        return "rr_path"
+    if iso.has_joliet():
+        return "joliet_path"
+    return "iso_path"
+
+
 def find_and_print_file(iso_file_path: str, target_file: str) -> None:
     iso = PyCdlib()
     iso.open(iso_file_path)
 
-    # 優先順位: Rock Ridge > Joliet > ISO 9660
-    if iso.has_rock_ridge():
-        path_type = "rr_path"
-    elif iso.has_joliet():
-        path_type = "joliet_path"
-    else:
-        path_type = "iso_path"
+    path_type = select_path_type(iso)
 
     print(f"Using path type: {path_type}")
 
@@ -4,16 +4,19 @@ import subprocess
 import tempfile
 import shutil
 import argparse
-import hexdump
 from pathlib import Path
 from typing import Optional
 
-try:
-    from dissect.cstruct import cstruct
-    from dissect.volume.vhd import VHD
-    DISSECT_AVAILABLE = True
-except ImportError:
-    DISSECT_AVAILABLE = False
+import metrics
+
+# hexdump / dissect は起動を速くするため、使うメソッドの中で import する
+
+
+def run_command(cmd, **kwargs):
+    """subprocess.run の薄いラッパ (呼び出し回数と時間を計測する)"""
+    metrics.incr("subprocess_calls")
+    with metrics.span(f"subprocess.{cmd[1] if cmd[0] == 'sudo' else cmd[0]}"):
+        return subprocess.run(cmd, **kwargs)
 
 
 class VHDCreator:
@@ -31,6 +34,7 @@ class VHDCreator:
         self.size_mb = size_mb
         self.size_bytes = size_mb * 1024 * 1024
         
+    @metrics.timed("vhd.create_vhd")
     def create_vhd(self):
         """VHDファイルを作成"""
         print(f"Creating VHD file: {self.vhd_path}")
@@ -39,15 +43,17 @@ class VHDCreator:
         with open(self.vhd_path, 'wb') as f:
             # VHDボディ（スパースファイル）
             f.write(b'\x00' * self.size_bytes)
+        metrics.incr("bytes_written", self.size_bytes)
         
         print(f"VHD file created: {self.vhd_path} ({self.size_mb}MB)")
         
+    @metrics.timed("vhd.create_filesystem")
     def create_filesystem(self):
         """VHD内にファイルシステムを作成"""
         print(f"Creating filesystem in VHD...")
         
         # ループデバイスをセットアップ
-        result = subprocess.run(
+        result = run_command(
             ['sudo', 'losetup', '-f', str(self.vhd_path)],
             capture_output=True,
             text=True
@@ -62,7 +68,7 @@ class VHDCreator:
         
         try:
             # ext4ファイルシステムを作成
-            result = subprocess.run(
+            result = run_command(
                 ['sudo', 'mkfs.ext4', '-F', loop_device],
                 capture_output=True,
                 text=True
@@ -76,15 +82,16 @@ class VHDCreator:
             return True
         finally:
             # ループデバイスをデタッチ
-            subprocess.run(['sudo', 'losetup', '-d', loop_device])
+            run_command(['sudo', 'losetup', '-d', loop_device])
     
+    @metrics.timed("vhd.mount_vhd")
     def mount_vhd(self, mount_point: str):
         """VHDをマウント"""
         mount_path = Path(mount_point)
         mount_path.mkdir(parents=True, exist_ok=True)
         
         # ループデバイスをセットアップ
-        result = subprocess.run(
+        result = run_command(
             ['sudo', 'losetup', '-f', str(self.vhd_path)],
             capture_output=True,
             text=True
@@ -98,7 +105,7 @@ class VHDCreator:
         print(f"Using loop device: {loop_device}")
         
         # マウント
-        result = subprocess.run(
+        result = run_command(
             ['sudo', 'mount', loop_device, str(mount_path)],
             capture_output=True,
             text=True
@@ -106,18 +113,20 @@ class VHDCreator:
         
         if result.returncode != 0:
             print(f"Mount error: {result.stderr}")
-            subprocess.run(['sudo', 'losetup', '-d', loop_device])
+            run_command(['sudo', 'losetup', '-d', loop_device])
             return None
         
         print(f"VHD mounted at: {mount_path}")
         return loop_device
     
+    @metrics.timed("vhd.unmount_vhd")
     def unmount_vhd(self, mount_point: str, loop_device: str):
         """VHDをアンマウント"""
-        subprocess.run(['sudo', 'umount', str(mount_point)])
-        subprocess.run(['sudo', 'losetup', '-d', loop_device])
+        run_command(['sudo', 'umount', str(mount_point)])
+        run_command(['sudo', 'losetup', '-d', loop_device])
         print(f"VHD unmounted from: {mount_point}")
     
+    @metrics.timed("vhd.add_text_file")
     def add_text_file(self, file_path: str, content: str):
         """
         VHD内にテキストファイルを追加
@@ -141,6 +150,7 @@ class VHDCreator:
             
             with open(file_full_path, 'w') as f:
                 f.write(content)
+            metrics.incr("bytes_written", len(content.encode()))
             
             print(f"File added to VHD: {file_path}")
             
@@ -157,9 +167,12 @@ class VHDCreator:
             if os.path.exists(mount_point):
                 shutil.rmtree(mount_point)
     
+    @metrics.timed("vhd.inspect_vhd")
     def inspect_vhd(self):
         """dissectを使用してVHDファイルを検査"""
-        if not DISSECT_AVAILABLE:
+        try:
+            from dissect.volume.vhd import VHD
+        except ImportError:
             print("Error: dissect not installed. Install with: uv pip install dissect.cstruct dissect.volume")
             return False
         
@@ -200,11 +213,15 @@ class VHDCreator:
             print(f"Error inspecting VHD: {e}")
             return False
     
+    @metrics.timed("vhd.hex_dump_vhd")
     def hex_dump_vhd(self, num_bytes: int = 512):
         """VHDファイルのヘックスダンプを表示"""
+        import hexdump
+
         try:
             with open(self.vhd_path, 'rb') as f:
                 data = f.read(num_bytes)
+                metrics.incr("bytes_read", len(data))
                 
                 print(f"\n{'='*60}")
                 print(f"VHD File Hex Dump (first {num_bytes} bytes): {self.vhd_path}")
@@ -220,7 +237,7 @@ class VHDCreator:
             return False
 
 
-def main():
+def main(argv=None):
     """コマンドラインインターフェース"""
     parser = argparse.ArgumentParser(
         description="VHD File Creator - VHDファイルの作成と管理",
@@ -290,7 +307,7 @@ def main():
     hexdump_parser.add_argument('vhd_path', help='VHDファイルパス')
     hexdump_parser.add_argument('-n', '--num-bytes', type=int, default=512, help='表示バイト数（デフォルト: 512）')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     if not args.command:
         parser.print_help()
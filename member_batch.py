@@ -0,0 +1,101 @@
+import argparse
+import time
+
+import numpy as np  # オプション依存: uv sync --extra sim
+
+from book433ok import HitPoint, Member, StateType, States
+
+# HitPoint.damage は HitPoint(amount=...) を作り直すので、ダメージ後の MIN は既定値に戻る
+DEFAULT_MIN = HitPoint.model_fields["MIN"].default
+
+
+class MemberBatch:
+    """
+    Member の集団を struct-of-arrays (NumPy の列) で保持し、まとめてダメージを与える
+
+    列: amount (HitPoint.amount), min (HitPoint.MIN), state (States.state)
+    Member との変換は from_members / to_members で行う (境界でのみ pydantic を使う)。
+    """
+
+    def __init__(self, amount: np.ndarray, min_: np.ndarray, state: np.ndarray):
+        if not (len(amount) == len(min_) == len(state)):
+            raise ValueError("amount, min and state must have the same length")
+        self.amount = np.asarray(amount, dtype=np.int64)
+        self.min = np.asarray(min_, dtype=np.int64)
+        self.state = np.asarray(state, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.amount)
+
+    @classmethod
+    def from_members(cls, members: list[Member]) -> "MemberBatch":
+        return cls(
+            np.fromiter((m.hitpoint.amount for m in members), dtype=np.int64, count=len(members)),
+            np.fromiter((m.hitpoint.MIN for m in members), dtype=np.int64, count=len(members)),
+            np.fromiter((m.states.state for m in members), dtype=np.int64, count=len(members)),
+        )
+
+    @classmethod
+    def full(cls, n: int, amount: int, state: int = StateType.alive.value) -> "MemberBatch":
+        """同じ初期値の Member を n 体作る"""
+        return cls(
+            np.full(n, amount, dtype=np.int64),
+            np.full(n, DEFAULT_MIN, dtype=np.int64),
+            np.full(n, state, dtype=np.int64),
+        )
+
+    def to_members(self) -> list[Member]:
+        return [
+            Member(hitpoint=HitPoint(amount=a, MIN=m), states=States(state=s))
+            for a, m, s in zip(self.amount.tolist(), self.min.tolist(), self.state.tolist())
+        ]
+
+    def damage(self, damage_amount) -> None:
+        """
+        全 Member に Member.damage(damage_amount) と同じ処理を一括で適用する (その場で更新)
+
+        Args:
+            damage_amount: スカラーまたは長さ len(self) の配列
+        """
+        np.subtract(self.amount, damage_amount, out=self.amount)
+        np.maximum(self.amount, self.min, out=self.amount)
+        self.min.fill(DEFAULT_MIN)
+        # HitPoint.is_zero() になった Member だけ dead の状態を加える
+        self.state[self.amount == 0] += StateType.dead.value
+
+    def is_zero(self) -> np.ndarray:
+        return self.amount == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MemberBatch ベンチマーク")
+    parser.add_argument('-n', '--number', type=int, default=1_000_000, help='Member 数（デフォルト: 1000000）')
+    parser.add_argument('-t', '--ticks', type=int, default=10, help='ダメージを与える回数（デフォルト: 10）')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    batch = MemberBatch.full(args.number, amount=100)
+    damages = rng.integers(0, 20, size=(args.ticks, args.number))
+
+    start = time.perf_counter()
+    for tick in damages:
+        batch.damage(tick)
+    elapsed = time.perf_counter() - start
+    print(f"{args.number} members x {args.ticks} ticks: {elapsed * 1000 / args.ticks:.2f} ms/tick")
+
+    # 少数の Member で 1 体ずつ処理した結果と一致することを確認
+    sample = 1000
+    members = [Member(hitpoint=HitPoint(amount=100), states=States()) for _ in range(sample)]
+    check = MemberBatch.from_members(members)
+    start = time.perf_counter()
+    for tick in damages:
+        members = [m.damage(int(d)) for m, d in zip(members, tick[:sample])]
+    elapsed = time.perf_counter() - start
+    print(f"Member.damage: {elapsed * 1000 / args.ticks * args.number / sample:.2f} ms/tick (extrapolated)")
+    for tick in damages:
+        check.damage(tick[:sample])
+    assert check.to_members() == members
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+軽量な計測レイヤ (タイミングスパンとカウンタ)
+
+    import metrics
+
+    with metrics.span("iso.find_iso"):
+        ...
+    metrics.incr("bytes_read", len(data))
+
+    @metrics.timed("vhd.create_vhd")
+    def create_vhd(self): ...
+
+主なカウンタ名: bytes_read, bytes_written, records_parsed, subprocess_calls,
+cache_hits, cache_misses
+(1 つのコマンドに段階の違うキャッシュがある場合は hash_cache_hits のように接頭辞で分ける)
+"""
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+_lock = threading.Lock()
+_counters: dict[str, int] = {}
+_spans: dict[str, list] = {}  # name -> [count, total_seconds, max_seconds]
+
+
+def incr(name: str, n: int = 1) -> None:
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def _record(name: str, elapsed: float) -> None:
+    with _lock:
+        stat = _spans.get(name)
+        if stat is None:
+            _spans[name] = [1, elapsed, elapsed]
+        else:
+            stat[0] += 1
+            stat[1] += elapsed
+            if elapsed > stat[2]:
+                stat[2] = elapsed
+
+
+@contextmanager
+def span(name: str):
+    """with ブロックの実行時間を name に記録する"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, time.perf_counter() - start)
+
+
+def timed(name: str):
+    """関数の実行時間を name に記録するデコレータ"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def snapshot() -> dict:
+    """現在の計測値を JSON にできる辞書で返す"""
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "spans": {
+                name: {"count": count, "total_s": total, "max_s": max_, "avg_s": total / count}
+                for name, (count, total, max_) in _spans.items()
+            },
+        }
+
+
+def merge(data: dict) -> None:
+    """別プロセス (ワーカー) の snapshot を取り込む"""
+    with _lock:
+        for name, n in data.get("counters", {}).items():
+            _counters[name] = _counters.get(name, 0) + n
+        for name, s in data.get("spans", {}).items():
+            stat = _spans.setdefault(name, [0, 0.0, 0.0])
+            stat[0] += s["count"]
+            stat[1] += s["total_s"]
+            stat[2] = max(stat[2], s["max_s"])
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _spans.clear()
+
+
+def collect(func, *args, **kwargs) -> tuple:
+    """
+    func をワーカーで実行し、(戻り値, その間の計測値) を返す
+
+    ProcessPoolExecutor に渡して、親プロセス側で merge する用途。
+    """
+    reset()
+    result = func(*args, **kwargs)
+    return result, snapshot()
@@ -0,0 +1,216 @@
+import argparse
+import hashlib
+import io
+import json
+import mmap
+from pathlib import PurePosixPath
+
+import lhafile
+from pycdlib.pycdlib import PyCdlib
+
+import metrics
+from file_util import hash_stream
+from isoparse2 import select_path_type
+from sfx_extractor import find_lzh_offset
+
+MAX_DEPTH = 8  # 入れ子の最大深さ
+MAX_SIZE = 512 * 1024 * 1024  # メモリ上に展開するメンバーの最大サイズ (512MB)
+SEPARATOR = "!/"  # 外側と内側のパスの区切り (例: sfx.exe!/disk.iso!/README.TXT)
+
+ISO_MAGIC_OFFSET = 0x8001  # Primary Volume Descriptor の "CD001"
+
+
+class OffsetView(io.RawIOBase):
+    """
+    親ファイルの [offset, offset + length) だけを見せる読み取り専用ビュー
+
+    データをコピーせずに SFX 内の LZH などを別ファイルとして扱うために使う。
+    親の fp は他のビューと共有されるため、read のたびに seek し直す。
+    """
+
+    def __init__(self, fp, offset: int, length: int):
+        super().__init__()
+        self._fp = fp
+        self._offset = offset
+        self._length = length
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self._length + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if pos < 0:
+            raise ValueError("Negative seek position")
+        self._pos = pos
+        return pos
+
+    def readinto(self, b) -> int:
+        size = min(len(b), self._length - self._pos)
+        if size <= 0:
+            return 0
+        self._fp.seek(self._offset + self._pos)
+        data = self._fp.read(size)
+        n = len(data)
+        b[:n] = data
+        self._pos += n
+        return n
+
+
+def _size_of(fp) -> int:
+    pos = fp.tell()
+    size = fp.seek(0, io.SEEK_END)
+    fp.seek(pos)
+    return size
+
+
+def detect_container(fp) -> str | None:
+    """先頭のマジックからコンテナ種別 ("sfx" / "lzh" / "iso") を判定する。該当しなければ None"""
+    fp.seek(0)
+    head = fp.read(ISO_MAGIC_OFFSET + 5)
+    fp.seek(0)
+    if len(head) >= 7 and head[2:5] == b'-lh' and head[6:7] == b'-':
+        return "lzh"
+    if head[ISO_MAGIC_OFFSET:ISO_MAGIC_OFFSET + 5] == b'CD001':
+        return "iso"
+    if head[:2] == b'MZ':
+        return "sfx"
+    return None
+
+
+def _iter_lzh(fp, max_size):
+    # lhafile はファイルオブジェクトを直接受け付けるので一時ファイルは不要
+    archive = lhafile.Lhafile(fp)
+    for info in archive.infolist():
+        if info.file_size > max_size:
+            yield info.filename, None, info.file_size
+            continue
+        yield info.filename, io.BytesIO(archive.read(info.filename)), info.file_size
+
+
+def _find_lzh_start(fp) -> int:
+    # mmap / BytesIO はコピーせずにそのまま検索する。それ以外 (ISO 内のメンバーなど) は読み込む
+    if isinstance(fp, mmap.mmap):
+        return find_lzh_offset(fp)
+    if isinstance(fp, io.BytesIO):
+        with fp.getbuffer() as view:
+            return find_lzh_offset(view)
+    fp.seek(0)
+    return find_lzh_offset(fp.read())
+
+
+def _iter_sfx(fp, max_size):
+    # SFX の後ろに付いている LZH をオフセットビューとして開く
+    # (LZH が見つからない普通の EXE は例外にしてリーフ扱いにする)
+    size = _size_of(fp)
+    lzh_start = _find_lzh_start(fp)
+    if lzh_start == -1:
+        raise ValueError("Valid LZH header not found in SFX file")
+    yield from _iter_lzh(OffsetView(fp, lzh_start, size - lzh_start), max_size)
+
+
+def _iter_iso(fp, max_size):
+    iso = PyCdlib()
+    iso.open_fp(fp)
+    try:
+        path_type = select_path_type(iso)
+        for parent_path, _, files in iso.walk(**{path_type: "/"}):
+            for f in files:
+                full_path = str(PurePosixPath(parent_path) / f)
+                # open_file_from_iso は元 ISO 上の範囲を読むビューなのでコピーは発生しない
+                with iso.open_file_from_iso(**{path_type: full_path}) as member:
+                    yield full_path.lstrip("/"), member, member.length()
+    finally:
+        iso.close()
+
+
+ITERATORS = {
+    "sfx": _iter_sfx,
+    "lzh": _iter_lzh,
+    "iso": _iter_iso,
+}
+
+
+def _walk(fp, path, size, depth, inventory, max_depth, max_size):
+    kind = detect_container(fp) if depth < max_depth else None
+    if kind == "sfx" and size > max_size:
+        # 大きすぎる SFX は LZH を探さず、メンバーと同じ形で記録する
+        inventory.append({"path": path, "size": size, "depth": depth, "skipped": "size limit"})
+        return
+    if kind is not None:
+        # 途中で失敗した場合に中途半端な結果を残さないよう、一旦ローカルに集める
+        found = []
+        try:
+            for name, child, child_size in ITERATORS[kind](fp, max_size):
+                child_path = f"{path}{SEPARATOR}{name}"
+                if child is None:
+                    found.append({"path": child_path, "size": child_size, "depth": depth + 1,
+                                  "skipped": "size limit"})
+                    continue
+                _walk(child, child_path, child_size, depth + 1, found, max_depth, max_size)
+            inventory.extend(found)
+            return
+        except Exception as e:
+            # マジックだけ一致した壊れたデータなどはリーフとして扱う
+            # (LZH を含まない普通の EXE はよくあるので警告しない)
+            if kind != "sfx":
+                print(f"Warning: cannot open {path} as {kind}: {e}")
+
+    # リーフファイル: サイズとハッシュだけを記録する
+    fp.seek(0)
+    digest = hash_stream(fp)
+    metrics.incr("records_parsed")
+    inventory.append({"path": path, "size": size, "depth": depth, "sha256": digest})
+
+
+def scan_nested(file_path, max_depth=MAX_DEPTH, max_size=MAX_SIZE):
+    """
+    入れ子になったコンテナを再帰的に展開し、リーフファイルの一覧を返す
+
+    中間ファイルはディスクに書かず、メモリ上のバッファかオフセットビューで処理する。
+
+    Args:
+        file_path: 最も外側のファイル
+        max_depth: 再帰の最大深さ
+        max_size: メモリ上に展開するメンバーの最大サイズ (バイト)
+
+    Returns:
+        {"path", "size", "depth", "sha256"} の辞書のリスト
+    """
+    inventory = []
+    with open(file_path, 'rb') as f:
+        size = _size_of(f)
+        if size == 0:
+            return [{"path": str(file_path), "size": 0, "depth": 0,
+                     "sha256": hashlib.sha256().hexdigest()}]
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            _walk(mm, str(file_path), size, 0, inventory, max_depth, max_size)
+    return inventory
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="入れ子コンテナ (SFX / LZH / ISO) の再帰展開")
+    parser.add_argument('file_path', help='入力ファイル')
+    parser.add_argument('--max-depth', type=int, default=MAX_DEPTH, help=f'最大深さ（デフォルト: {MAX_DEPTH}）')
+    parser.add_argument('--max-size', type=int, default=MAX_SIZE, help='メモリ展開する最大サイズ（バイト）')
+    args = parser.parse_args(argv)
+
+    inventory = scan_nested(args.file_path, max_depth=args.max_depth, max_size=args.max_size)
+    print(json.dumps(inventory, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import metrics
+from file_util import file_key, hash_file
+from sfx_extractor import extract_lzh_from_sfx
+
+INDEX_NAME = "index.json"  # 出力ディレクトリ直下に置く永続キャッシュ
+MANIFEST_NAME = "manifest.json"
+SAVE_EVERY = 16  # 展開がこの件数終わるごとに index.json を保存する (中断しても失わない)
+
+
+def load_index(output_root):
+    """ハッシュ→結果 のキャッシュを読み込む (無ければ空)"""
+    index_path = Path(output_root) / INDEX_NAME
+    if not index_path.exists():
+        return {"results": {}, "files": {}}
+    with open(index_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_index(output_root, index):
+    """途中で落ちても壊れないよう一時ファイル経由で置き換える"""
+    index_path = Path(output_root) / INDEX_NAME
+    tmp_path = index_path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, index_path)
+
+
+def extract_one(sfx_path, digest, output_root):
+    """1 つの SFX を <output_root>/<sha256>/ に展開し、マニフェストを書く (ワーカーで実行)"""
+    out_dir = Path(output_root) / digest
+    out_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        infos = extract_lzh_from_sfx(str(sfx_path), str(out_dir))
+    except Exception as e:
+        # 途中まで展開したメンバーも含めてディレクトリごと消す
+        # (未処理のハッシュのディレクトリは、残っていても前回失敗した残骸)
+        shutil.rmtree(out_dir, ignore_errors=True)
+        return {"sha256": digest, "source": str(sfx_path), "error": str(e)}
+
+    manifest = {
+        "sha256": digest,
+        "source": str(sfx_path),
+        "size": os.path.getsize(sfx_path),
+        "members": [
+            {
+                "filename": info.filename,
+                "file_size": info.file_size,
+                "compress_size": info.compress_size,
+                "crc": info.CRC,
+            }
+            for info in infos
+        ],
+    }
+    with open(out_dir / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def batch_extract(input_dir, output_root, workers=None, pattern="*.exe"):
+    """
+    ディレクトリ内の SFX をまとめて展開する
+
+    Args:
+        input_dir: SFX ファイルを含むディレクトリ
+        output_root: 展開先ルート (ハッシュ毎のサブディレクトリと index.json を作成)
+        workers: ワーカープロセス数 (None で CPU 数)
+        pattern: 対象ファイルの glob パターン
+
+    Returns:
+        ({ファイルパス: sha256}, {展開に失敗したファイルパス: エラーメッセージ})
+    """
+    output_root = Path(output_root)
+    output_root.mkdir(parents=True, exist_ok=True)
+    index = load_index(output_root)
+    results = index["results"]
+    known_files = index["files"]
+
+    # 1. ハッシュ計算 (stat が同じなら前回の値を再利用)
+    path_to_hash = {}
+    for path in sorted(Path(input_dir).rglob(pattern)):
+        if not path.is_file():
+            continue
+        # (サイズ, mtime) が変わっていなければハッシュを再計算しない
+        key = file_key(path)
+        cached = known_files.get(str(path))
+        if cached and cached["key"] == key:
+            metrics.incr("hash_cache_hits")
+            digest = cached["sha256"]
+        else:
+            metrics.incr("hash_cache_misses")
+            digest = hash_file(path)
+            known_files[str(path)] = {"key": key, "sha256": digest}
+        path_to_hash[str(path)] = digest
+
+    # ハッシュ計算の結果はここで一度保存しておく
+    save_index(output_root, index)
+
+    # 2. 未処理のハッシュだけを 1 ファイルずつ選ぶ (同一内容は 1 回だけ展開)
+    # (前回失敗したものは results に入っていないので毎回やり直す)
+    pending = {}
+    for path, digest in path_to_hash.items():
+        if "manifest" not in results.get(digest, {}) and digest not in pending:
+            pending[digest] = path
+        else:
+            metrics.incr("result_cache_hits")
+
+    print(f"Files: {len(path_to_hash)}, unique: {len(set(path_to_hash.values()))}, "
+          f"to extract: {len(pending)}")
+
+    # 3. ワーカープールで展開
+    errors = {}
+    try:
+        if pending:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    pool.submit(metrics.collect, extract_one, path, digest, str(output_root)): digest
+                    for digest, path in pending.items()
+                }
+                for done, future in enumerate(as_completed(futures), 1):
+                    digest = futures[future]
+                    result, worker_metrics = future.result()
+                    metrics.merge(worker_metrics)
+                    if "error" in result:
+                        print(f"Error: {result['source']}: {result['error']}")
+                        errors[result['source']] = result['error']
+                        results.pop(digest, None)
+                    else:
+                        print(f"Extracted: {result['source']} -> {digest}")
+                        results[digest] = {"manifest": str(Path(digest) / MANIFEST_NAME)}
+                    if done % SAVE_EVERY == 0:
+                        save_index(output_root, index)
+    finally:
+        save_index(output_root, index)
+    return path_to_hash, errors
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="SFX 一括展開 (内容ハッシュで重複排除)")
+    parser.add_argument('input_dir', help='SFX ファイルを含むディレクトリ')
+    parser.add_argument('output_dir', help='展開先ルートディレクトリ')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='ワーカー数（デフォルト: CPU数）')
+    parser.add_argument('-p', '--pattern', default='*.exe', help='対象ファイルの glob（デフォルト: *.exe）')
+    args = parser.parse_args(argv)
+
+    _, errors = batch_extract(args.input_dir, args.output_dir, workers=args.workers, pattern=args.pattern)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,22 @@
 import lhafile
 import os
 import re
+from pathlib import PurePosixPath
+
+import metrics
 
 def find_lzh_start(file_path):
     # ファイルの末尾から有効なLZHヘッダーを探す
-    # re を使ってパターンマッチングで探す
-    # [ヘッダ長][02]["-lhX-"]
     with open(file_path, 'rb') as f:
         data = f.read()
-    
+    metrics.incr("bytes_read", len(data))
+    return find_lzh_offset(data)
+
+
+def find_lzh_offset(data):
+    # バイト列 (bytes / mmap) から有効なLZHヘッダーの位置を探す
+    # re を使ってパターンマッチングで探す
+    # [ヘッダ長][02]["-lhX-"]
     pattern = re.compile(rb'..-lh[0576d]-')
     # 後ろから探すため、finditer の結果を逆順に
     for match in reversed(list(pattern.finditer(data))):
@@ -21,6 +29,15 @@ def find_lzh_start(file_path):
 
 
 
+def safe_member_path(output_dir, filename):
+    # アーカイブ内の絶対パスや ".." で output_dir の外に書かないようにする
+    parts = PurePosixPath(filename.replace("\\", "/")).parts
+    if not parts or parts[0] == "/" or ":" in parts[0] or ".." in parts:
+        raise ValueError(f"Unsafe member path: {filename}")
+    return os.path.join(output_dir, *parts)
+
+
+@metrics.timed("sfx.extract_lzh_from_sfx")
 def extract_lzh_from_sfx(sfx_path, output_dir):
     # LZHヘッダーの開始位置を探す
     lzh_start = find_lzh_start(sfx_path)
@@ -31,23 +48,33 @@ def extract_lzh_from_sfx(sfx_path, output_dir):
     with open(sfx_path, 'rb') as f:
         f.seek(lzh_start)
         lzh_data = f.read()
+    metrics.incr("bytes_read", len(lzh_data))
 
     # 一時ファイルとしてLZHデータを保存
     temp_lzh_path = os.path.join(output_dir, 'temp.lzh')
     with open(temp_lzh_path, 'wb') as temp_f:
         temp_f.write(lzh_data)
 
-    # LZHファイルを解凍
-    archive = lhafile.Lhafile(temp_lzh_path)
-    for info in archive.infolist():
-        data = archive.read(info.filename)
-        with open(os.path.join(output_dir, info.filename), 'wb') as f:
-            f.write(data)
-    # archive を解放
-    del archive
-
-    # 一時ファイルを削除
-    os.remove(temp_lzh_path)
+    try:
+        # LZHファイルを解凍
+        archive = lhafile.Lhafile(temp_lzh_path)
+        infos = archive.infolist()
+        for info in infos:
+            data = archive.read(info.filename)
+            dest = safe_member_path(output_dir, info.filename)
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            with open(dest, 'wb') as f:
+                f.write(data)
+            metrics.incr("records_parsed")
+            metrics.incr("bytes_written", len(data))
+        # archive を解放
+        del archive
+    finally:
+        # 一時ファイルを削除 (解凍に失敗した場合も残さない)
+        os.remove(temp_lzh_path)
+
+    # 展開したメンバー情報 (ファイル名・サイズ・CRC) を返す
+    return infos
 
 # 使用例
 if __name__ == "__main__":
@@ -0,0 +1,26 @@
+"""
+検証済みの値から pydantic モデルのインスタンスを検証なしで組み立てるための部品
+
+モデルのメソッドが自分のフィールドから導出した値 (int 同士の和など) で新しいインスタンスを
+作るときだけ使う。外から来た値は必ず公開コンストラクタ (検証付き) を通すこと。
+
+    @classmethod
+    def _trusted(cls, value: int) -> "AttackPower":
+        obj = new(cls)
+        set_dict(obj, {'value': value})
+        set_fields_set(obj, {'value'})
+        set_extra(obj, None)
+        set_private(obj, None)
+        return obj
+
+BaseModel のスロット記述子を直接呼ぶので、object.__setattr__ での名前解決も
+pydantic の __setattr__ (frozen チェック) も通らない。
+"""
+
+from pydantic import BaseModel
+
+new = object.__new__
+set_dict = BaseModel.__dict__['__dict__'].__set__
+set_fields_set = BaseModel.__dict__['__pydantic_fields_set__'].__set__
+set_extra = BaseModel.__dict__['__pydantic_extra__'].__set__
+set_private = BaseModel.__dict__['__pydantic_private__'].__set__